@@ -0,0 +1,161 @@
+"""
+Coalescing buffer for student location pings.
+
+``update_location`` fires on page loads, so writing every ping straight to
+MongoDB costs a write per page view. Instead the latest fix per user is kept
+in memory and written in bulk ``UpdateOne`` batches, at most once per user
+per ``LOCATION_FLUSH_INTERVAL`` seconds. Pings that have not moved more than
+``LOCATION_MIN_DISTANCE_M`` metres from the stored position (and name the
+same place) are dropped. Pending fixes are flushed at interpreter shutdown.
+"""
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from pymongo import UpdateOne
+
+from college_voting.mongo import get_collection
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class LocationCoalescer:
+    def __init__(self, collection_factory, interval=60, min_distance_m=50):
+        self.collection_factory = collection_factory
+        self.interval = interval
+        self.min_distance_m = min_distance_m
+        self._pending = {}      # user _id -> fields to $set
+        self._stored = {}       # user _id -> (latitude, longitude, city, country)
+        self._last_flush = {}   # user _id -> monotonic time of last write
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.received = 0
+        self.skipped = 0
+        self.written = 0
+
+    def _is_unchanged(self, baseline, latitude, longitude, city, country):
+        if baseline is None or baseline[0] is None or baseline[1] is None:
+            return False
+        if (baseline[2] or '') != city or (baseline[3] or '') != country:
+            return False
+        return distance_m(baseline[0], baseline[1], latitude, longitude) < self.min_distance_m
+
+    def record(self, user, latitude, longitude, city='', country=''):
+        """Buffer a location fix; returns False if it was dropped as unchanged"""
+        user_id = user.pk
+        with self._lock:
+            self.received += 1
+            pending = self._pending.get(user_id)
+            if pending is not None:
+                baseline = (pending['latitude'], pending['longitude'], pending['city'], pending['country'])
+            else:
+                baseline = self._stored.get(user_id) or (user.latitude, user.longitude, user.city, user.country)
+            if self._is_unchanged(baseline, latitude, longitude, city, country):
+                self.skipped += 1
+                return False
+
+            self._pending[user_id] = {
+                'latitude': latitude,
+                'longitude': longitude,
+                'city': city,
+                'country': country,
+                'last_location_update': timezone.now(),
+            }
+            self._ensure_thread()
+
+        if self.interval <= 0:
+            self.flush(force=True)
+        return True
+
+    def _ensure_thread(self):
+        if self.interval <= 0:
+            return
+        # Threads don't survive a fork, so start one per worker process
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='location-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        tick = min(self.interval, 5)
+        while True:
+            time.sleep(tick)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Location flush failed: %s", e)
+
+    def flush(self, force=False):
+        """Write buffered fixes whose user has not been written within the interval"""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                user_id for user_id in self._pending
+                if force or now - self._last_flush.get(user_id, 0) >= self.interval
+            ]
+            batch = {user_id: self._pending.pop(user_id) for user_id in due}
+        if not batch:
+            return 0
+
+        ops = [UpdateOne({'_id': user_id}, {'$set': fields}) for user_id, fields in batch.items()]
+        try:
+            self.collection_factory().bulk_write(ops, ordered=False)
+        except Exception:
+            # Put the fixes back unless a newer one arrived meanwhile
+            with self._lock:
+                for user_id, fields in batch.items():
+                    self._pending.setdefault(user_id, fields)
+            raise
+
+        with self._lock:
+            for user_id, fields in batch.items():
+                self._stored[user_id] = (fields['latitude'], fields['longitude'], fields['city'], fields['country'])
+                self._last_flush[user_id] = now
+            self.written += len(batch)
+        return len(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'received': self.received,
+                'skipped': self.skipped,
+                'written': self.written,
+            }
+
+
+def _users_collection():
+    from .models import User
+    return get_collection(User)
+
+
+location_buffer = LocationCoalescer(
+    _users_collection,
+    interval=getattr(settings, 'LOCATION_FLUSH_INTERVAL', 60),
+    min_distance_m=getattr(settings, 'LOCATION_MIN_DISTANCE_M', 50),
+)
+
+
+@atexit.register
+def _flush_on_shutdown():
+    try:
+        location_buffer.flush(force=True)
+    except Exception as e:
+        logger.error("Location flush at shutdown failed: %s", e)
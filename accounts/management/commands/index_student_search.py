@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from accounts.models import User
+from accounts.search import ensure_student_indexes, search_keys
+from college_voting.mongo import get_collection
+
+
+class Command(BaseCommand):
+    help = 'Create the student search indexes and fill in search_keys for existing users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute keys for every user, not only those missing them')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Users updated per bulk write (default: 500)')
+
+    def handle(self, *args, **options):
+        users = get_collection(User)
+        ensure_student_indexes(users)
+
+        query = {} if options['all'] else {'search_keys': {'$exists': False}}
+        ops = []
+        updated = 0
+        for doc in users.find(query, {'full_name': 1, 'email': 1, 'student_id': 1}):
+            keys = search_keys(doc.get('full_name'), doc.get('email'), doc.get('student_id'))
+            ops.append(UpdateOne({'_id': doc['_id']}, {'$set': {'search_keys': keys}}))
+            if len(ops) >= options['batch_size']:
+                updated += users.bulk_write(ops, ordered=False).modified_count
+                ops = []
+        if ops:
+            updated += users.bulk_write(ops, ordered=False).modified_count
+
+        self.stdout.write(self.style.SUCCESS(f'Done: search keys written for {updated} users.'))
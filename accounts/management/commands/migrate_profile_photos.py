@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from accounts.models import User
+from accounts.photos import PhotoError, compress_photo, decode_data_uri, store_photo
+from college_voting.mongo import get_collection
+from college_voting.thumbnails import make_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Move inline profile_image_base64 photos into the profile_photos collection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Users loaded and updated per round trip (default: 50)')
+
+    def handle(self, *args, **options):
+        users = get_collection(User)
+        batch_size = options['batch_size']
+        query = {'profile_image_base64': {'$exists': True}}
+        moved = failed = 0
+        last_id = None
+
+        while True:
+            # Walk by _id so the batches stay correct while documents shrink
+            batch_query = dict(query, _id={'$gt': last_id}) if last_id else query
+            batch = list(
+                users.find(batch_query, {'email': 1, 'profile_image_base64': 1, 'profile_thumb': 1})
+                .sort('_id', 1).limit(batch_size)
+            )
+            if not batch:
+                break
+            last_id = batch[-1]['_id']
+
+            ops = []
+            for doc in batch:
+                update = {'$unset': {'profile_image_base64': ''}}
+                if doc.get('profile_image_base64'):
+                    try:
+                        data = compress_photo(decode_data_uri(doc['profile_image_base64']))
+                    except PhotoError as e:
+                        # Leave the inline photo in place so nothing is lost
+                        failed += 1
+                        self.stderr.write(f'{doc.get("email")}: {e}')
+                        continue
+                    update['$set'] = {'profile_photo': store_photo(data)}
+                    if not doc.get('profile_thumb'):
+                        try:
+                            update['$set']['profile_thumb'] = make_thumbnails(data)
+                        except Exception as e:
+                            self.stderr.write(f'{doc.get("email")}: thumbnail failed: {e}')
+                    moved += 1
+                ops.append(UpdateOne({'_id': doc['_id']}, update))
+            if ops:
+                users.bulk_write(ops, ordered=False)
+            self.stdout.write(f'{moved} photos moved...')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {moved} moved, {failed} failed.'))
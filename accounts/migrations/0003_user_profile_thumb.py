@@ -0,0 +1,18 @@
+# Generated by Django 3.2.23 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_auto_20260204_1726'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_thumb',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
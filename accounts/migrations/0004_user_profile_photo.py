@@ -0,0 +1,18 @@
+# Generated by Django 3.2.23 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_profile_thumb'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_photo',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -1,10 +1,71 @@
 from djongo import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.db.models.signals import post_save, pre_save
+from pymongo.errors import DuplicateKeyError
+from college_voting.mongo import get_collection, mark_saved, model_to_document
+from college_voting.thumbnails import thumbnail_url
+from .photos import photo_url
+from .search import SEARCH_FIELDS, search_keys, update_search_keys
 import re
 
 
-
+class DirtyFieldsMixin:
+    """
+    Remembers field values as loaded from the database so that a plain
+    save() only writes the fields that actually changed.
+
+    Through djongo a full save rewrites the whole document, including large
+    fields that the save did not touch. With this mixin save() on a
+    loaded instance becomes ``save(update_fields=<changed fields>)``, which
+    djongo sends as a targeted ``$set``, and is skipped entirely when nothing
+    changed. Explicit ``update_fields`` and inserts behave as usual.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_loaded_values()
+        return instance
+
+    def _snapshot_loaded_values(self, update_fields=None):
+        # Deferred fields are not in __dict__ and are never reported dirty
+        values = {
+            f.attname: self.__dict__[f.attname]
+            for f in self._meta.concrete_fields
+            if not f.primary_key and f.attname in self.__dict__
+        }
+        loaded = getattr(self, '_loaded_values', None)
+        if update_fields is None or loaded is None:
+            self._loaded_values = values
+        else:
+            # Only the written fields match the database now
+            for name in update_fields:
+                attname = self._meta.get_field(name).attname
+                if attname in values:
+                    loaded[attname] = values[attname]
+
+    def get_dirty_fields(self):
+        """Names of fields changed since load, or None if not loaded from the DB"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return [
+            attname for attname, value in loaded.items()
+            if self.__dict__.get(attname, value) != value
+        ]
+
+    def save(self, *args, **kwargs):
+        if (not args and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert') and not self._state.adding):
+            dirty = self.get_dirty_fields()
+            if dirty is not None:
+                if not dirty:
+                    return
+                kwargs['update_fields'] = dirty
+        super().save(*args, **kwargs)
+        self._snapshot_loaded_values(kwargs.get('update_fields'))
 
 
 class UserManager(BaseUserManager):
@@ -23,7 +84,7 @@ class UserManager(BaseUserManager):
         return self.create_user(email, password, **extra_fields)
 
 
-class User(AbstractBaseUser):
+class User(DirtyFieldsMixin, AbstractBaseUser):
     _id = models.ObjectIdField()
     email = models.EmailField(unique=True)
     full_name = models.CharField(max_length=200)
@@ -41,9 +102,10 @@ class User(AbstractBaseUser):
     country = models.CharField(max_length=200, null=True, blank=True)
     last_location_update = models.DateTimeField(null=True, blank=True)
     
-    # Base64 image storage for Vercel/Read-only environments
-    profile_image_base64 = models.TextField(null=True, blank=True)
-
+    # Webcam photo kept in the profile_photos collection (see accounts/photos.py)
+    profile_photo = models.CharField(max_length=64, null=True, blank=True)
+    # Reference to cached thumbnails (see college_voting/thumbnails.py)
+    profile_thumb = models.CharField(max_length=100, null=True, blank=True)
 
     objects = UserManager()
 
@@ -56,6 +118,43 @@ class User(AbstractBaseUser):
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        if (self._state.adding and not args and not kwargs.get('force_update')
+                and kwargs.get('update_fields') is None):
+            self._insert(kwargs.get('using') or 'default')
+            return
+        # Keep the search index in step with the searched fields written now
+        dirty = None if self._state.adding else self.get_dirty_fields()
+        changed = set(SEARCH_FIELDS) if dirty is None else set(dirty) & set(SEARCH_FIELDS)
+        if kwargs.get('update_fields') is not None:
+            changed &= set(kwargs['update_fields'])
+        super().save(*args, **kwargs)
+        if changed:
+            update_search_keys(self)
+
+    def _insert(self, using):
+        """Insert a new user with its search keys in one write"""
+        pre_save.send(sender=type(self), instance=self, raw=False, using=using, update_fields=None)
+        document = model_to_document(self, using)
+        document['search_keys'] = search_keys(self.full_name, self.email, self.student_id)
+        try:
+            get_collection(type(self), using).insert_one(document)
+        except DuplicateKeyError as e:
+            # What djongo raises for the unique email / student_id indexes
+            raise IntegrityError(str(e)) from e
+        mark_saved(self, using)
+        self._snapshot_loaded_values()
+        post_save.send(sender=type(self), instance=self, created=True, update_fields=None, raw=False, using=using)
+
+    @property
+    def profile_thumb_url(self):
+        return thumbnail_url(self.profile_thumb, 'sm')
+
+    @property
+    def profile_photo_url(self):
+        """Profile-sized photo: the large thumbnail, else the stored original"""
+        return thumbnail_url(self.profile_thumb, 'md') or photo_url(self.profile_photo)
+
     @property
     def is_staff(self):
         return self.is_admin
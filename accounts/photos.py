@@ -0,0 +1,118 @@
+"""
+Profile photo store.
+
+Photos used to live on the User document as a full data-URI string, so every
+user query (logins, session loads, admin lists) dragged the image along.
+They are now kept in their own ``profile_photos`` collection, one document
+per photo keyed by the SHA-256 of the stored bytes::
+
+    {'_id': '<sha256>', 'data': <binary JPEG>, 'content_type': 'image/jpeg',
+     'size': 41234, 'created_at': <datetime>}
+
+and the User only keeps that key in ``profile_photo``. The collection is used
+instead of file storage because deployments such as Vercel have no writable
+filesystem. Photos are re-encoded and size-capped before they are stored.
+"""
+import base64
+import binascii
+import hashlib
+import io
+
+from bson import Binary
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from college_voting.mongo import get_collection
+
+PHOTO_COLLECTION = 'profile_photos'
+CONTENT_TYPE = 'image/jpeg'
+# Qualities tried in turn until the encoded photo fits PROFILE_PHOTO_MAX_BYTES
+QUALITIES = (82, 70, 55, 40)
+
+
+class PhotoError(ValueError):
+    """The submitted photo is missing, too large or not an image"""
+
+
+def _photos():
+    return get_collection(PHOTO_COLLECTION)
+
+
+def decode_data_uri(data_uri):
+    """Return the bytes of a ``data:image/...;base64,`` string"""
+    if not data_uri or ';base64,' not in data_uri:
+        raise PhotoError('Photo is not a base64 data URI.')
+    encoded = data_uri.split(';base64,', 1)[1]
+    max_bytes = getattr(settings, 'PROFILE_PHOTO_MAX_UPLOAD_BYTES', 5 * 1024 * 1024)
+    # base64 inflates by 4/3; reject before decoding a huge payload
+    if len(encoded) * 3 // 4 > max_bytes:
+        raise PhotoError('Photo is too large.')
+    try:
+        return base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        raise PhotoError('Photo is not valid base64.')
+
+
+def compress_photo(data):
+    """Re-encode image bytes as a bounded JPEG without metadata"""
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception:
+        raise PhotoError('Photo is not a valid image.')
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    dimension = getattr(settings, 'PROFILE_PHOTO_MAX_DIMENSION', 640)
+    image.thumbnail((dimension, dimension))
+
+    max_bytes = getattr(settings, 'PROFILE_PHOTO_MAX_BYTES', 200 * 1024)
+    for quality in QUALITIES:
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=quality, optimize=True)
+        if buffer.tell() <= max_bytes:
+            break
+    return buffer.getvalue()
+
+
+def store_photo(data):
+    """Store already compressed photo bytes; returns the photo reference"""
+    ref = hashlib.sha256(data).hexdigest()
+    _photos().update_one(
+        {'_id': ref},
+        {'$setOnInsert': {
+            'data': Binary(data),
+            'content_type': CONTENT_TYPE,
+            'size': len(data),
+            'created_at': timezone.now(),
+        }},
+        upsert=True,
+    )
+    return ref
+
+
+def save_photo_from_data_uri(data_uri):
+    """Decode, compress and store a webcam photo; returns (ref, jpeg bytes)"""
+    data = compress_photo(decode_data_uri(data_uri))
+    return store_photo(data), data
+
+
+def load_photo(ref):
+    """Return (bytes, content type) of a stored photo, or None"""
+    doc = _photos().find_one({'_id': ref}, {'data': 1, 'content_type': 1})
+    if doc is None:
+        return None
+    return bytes(doc['data']), doc.get('content_type', CONTENT_TYPE)
+
+
+def delete_photo(ref):
+    """Delete a photo unless another user still references it"""
+    from .models import User
+    if ref and not get_collection(User).count_documents({'profile_photo': ref}, limit=1):
+        _photos().delete_one({'_id': ref})
+
+
+def photo_url(ref):
+    return reverse('profile_photo', args=[ref]) if ref else None
@@ -0,0 +1,134 @@
+"""
+Indexed student search with keyset pagination.
+
+Each user document carries ``search_keys``: the lower-cased, accent-stripped
+words of the full name, the email address and its local part, and the
+student id. A multikey index on that array answers anchored prefix regexes
+(``^ali``), so a search never scans the collection; every word of the query
+must prefix one of the keys. Pages are ordered newest first on
+(date_joined, _id) and the cursor is the position of the last row shown, so
+only one page of students is ever fetched.
+
+Keys are written with a new user's insert, by ``User.save()`` when a searched
+field changes, and for existing users by the ``index_student_search`` command.
+"""
+import re
+import threading
+import unicodedata
+from datetime import datetime, timezone as dt_timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+
+from college_voting.mongo import get_collection
+
+SEARCH_FIELDS = ('full_name', 'email', 'student_id')
+PAGE_SIZE = 50
+
+SEARCH_INDEX = [('search_keys', ASCENDING), ('date_joined', DESCENDING)]
+SEARCH_INDEX_NAME = 'users_search_keys_date_joined'
+LIST_INDEX = [('is_admin', ASCENDING), ('date_joined', DESCENDING), ('_id', DESCENDING)]
+LIST_INDEX_NAME = 'users_is_admin_date_joined'
+
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def normalize(text):
+    """Lower-case and strip accents, so 'José' is found by 'jose'"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def search_keys(full_name, email, student_id):
+    keys = set(re.split(r'[^\w]+', normalize(full_name)))
+    email = normalize(email)
+    keys.update((email, email.split('@', 1)[0]))
+    student_id = normalize(student_id)
+    keys.update((student_id, re.sub(r'[^\w]+', '', student_id)))
+    keys.discard('')
+    return sorted(keys)
+
+
+def update_search_keys(user):
+    get_collection(type(user)).update_one(
+        {'_id': user.pk},
+        {'$set': {'search_keys': search_keys(user.full_name, user.email, user.student_id)}},
+    )
+
+
+def ensure_student_indexes(collection):
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    with _indexes_lock:
+        if not _indexes_ready:
+            collection.create_index(SEARCH_INDEX, name=SEARCH_INDEX_NAME)
+            collection.create_index(LIST_INDEX, name=LIST_INDEX_NAME)
+            _indexes_ready = True
+
+
+def encode_cursor(date_joined, user_id):
+    return f'{date_joined.isoformat()}~{user_id}'
+
+
+def decode_cursor(cursor):
+    """Return (date_joined, ObjectId) for a cursor string, or None if invalid"""
+    try:
+        date_joined, user_id = cursor.split('~', 1)
+        return datetime.fromisoformat(date_joined), ObjectId(user_id)
+    except (ValueError, InvalidId):
+        return None
+
+
+def _aware(value):
+    # pymongo returns naive UTC datetimes
+    return value.replace(tzinfo=dt_timezone.utc) if value and value.tzinfo is None else value
+
+
+def student_count(user_model):
+    return get_collection(user_model).count_documents({'is_admin': {'$ne': True}})
+
+
+def student_page(user_model, fields, query='', cursor=None, limit=PAGE_SIZE):
+    """
+    Return {'students': [User, ...], 'next_cursor': str or None} for one page
+    of non-admin users matching ``query``, newest first. Only ``fields`` are
+    loaded.
+    """
+    collection = get_collection(user_model)
+    ensure_student_indexes(collection)
+
+    conditions = [{'is_admin': {'$ne': True}}]
+    terms = normalize(query).split()
+    if terms:
+        conditions.append({'search_keys': {'$all': [re.compile('^' + re.escape(t)) for t in terms]}})
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        date_joined, user_id = position
+        conditions.append({'$or': [
+            {'date_joined': {'$lt': date_joined}},
+            {'date_joined': date_joined, '_id': {'$lt': user_id}},
+        ]})
+
+    docs = list(
+        collection.find({'$and': conditions}, {field: 1 for field in fields})
+        .sort([('date_joined', DESCENDING), ('_id', DESCENDING)])
+        .limit(limit + 1)
+    )
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    students = []
+    for doc in docs:
+        values = {field: doc.get(field) for field in fields}
+        for field in ('date_joined', 'last_location_update'):
+            if field in values:
+                values[field] = _aware(values[field])
+        students.append(user_model(_id=doc['_id'], **values))
+
+    next_cursor = None
+    if has_more and docs:
+        next_cursor = encode_cursor(docs[-1]['date_joined'], docs[-1]['_id'])
+    return {'students': students, 'next_cursor': next_cursor}
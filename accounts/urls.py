@@ -10,6 +10,7 @@ urlpatterns = [
     path('reset-password/', views.reset_password, name='reset_password'),
     path('resend-otp/', views.resend_otp, name='resend_otp'),
     path('update-location/', views.update_location, name='update_location'),
+    path('photo/<str:ref>/', views.profile_photo, name='profile_photo'),
     path('logout/', views.logout_view, name='logout'),
 ]
 
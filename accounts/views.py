@@ -4,16 +4,21 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.views.decorators.http import require_POST
-from django.utils import timezone
 from .forms import LoginForm
 from .models import User
 from .utils import generate_otp, send_otp_email
+from .location_buffer import location_buffer
+from .photos import PhotoError, delete_photo, load_photo, save_photo_from_data_uri
+from college_voting.thumbnails import make_thumbnails
 import base64
+import logging
 import time
 from django.core.files.base import ContentFile
 
+logger = logging.getLogger(__name__)
+
 
 
 def landing(request):
@@ -126,13 +131,27 @@ def set_password(request):
             return render(request, 'accounts/set_password.html')
             
         try:
-            # Create user with Base64 image directly
+            # Compress the photo and keep it out of the user document
+            photo_ref, photo_bytes = save_photo_from_data_uri(image_data)
+        except PhotoError as e:
+            messages.error(request, str(e))
+            return render(request, 'accounts/set_password.html')
+
+        try:
+            profile_thumb = make_thumbnails(photo_bytes)
+        except Exception as e:
+            # Pages fall back to the stored photo; backfill_thumbnails retries
+            logger.warning("Thumbnail for %s failed: %s", registration_data['email'], e)
+            profile_thumb = None
+
+        try:
             user = User.objects.create_user(
                 email=registration_data['email'],
                 password=password,
                 full_name=registration_data['full_name'],
                 student_id=registration_data['student_id'],
-                profile_image_base64=image_data
+                profile_photo=photo_ref,
+                profile_thumb=profile_thumb,
             )
             
             # Clear session
@@ -141,6 +160,7 @@ def set_password(request):
             messages.success(request, 'Registration successful! You can now login.')
             return redirect('login')
         except Exception as e:
+            delete_photo(photo_ref)
             messages.error(request, f'Error creating account: {e}')
             
     return render(request, 'accounts/set_password.html')
@@ -358,14 +378,8 @@ def update_location(request):
         if not latitude or not longitude:
             return JsonResponse({'success': False, 'error': 'Missing location data'}, status=400)
         
-        # Update user's location
-        user = request.user
-        user.latitude = float(latitude)
-        user.longitude = float(longitude)
-        user.city = city
-        user.country = country
-        user.last_location_update = timezone.now()
-        user.save()
+        # Buffer the fix; it is written to the DB in coalesced batches
+        location_buffer.record(request.user, float(latitude), float(longitude), city, country)
         
         return JsonResponse({
             'success': True,
@@ -380,3 +394,24 @@ def update_location(request):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+
+
+@login_required
+def profile_photo(request, ref):
+    """Serve a stored profile photo to its owner or an admin"""
+    if not (request.user.is_admin or request.user.profile_photo == ref):
+        raise Http404('Photo not found')
+
+    # The reference is a hash of the bytes, so a cached copy never goes stale
+    etag = f'"{ref}"'
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+        response = HttpResponseNotModified()
+    else:
+        photo = load_photo(ref)
+        if photo is None:
+            raise Http404('Photo not found')
+        data, content_type = photo
+        response = HttpResponse(data, content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
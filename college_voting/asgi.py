@@ -3,6 +3,15 @@ ASGI config for college_voting project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests for the live results event stream are answered by
+``voting.live.sse_application`` so that long-lived connections don't tie up
+Django's request handling; everything else goes to Django as usual.
+
+With ``VOTING_ASYNC_VIEWS`` on, the student voting views are async and use a
+non-blocking Mongo driver (see voting/async_views.py). Serve with e.g.
+
+    gunicorn college_voting.asgi:application -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -13,4 +22,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up, since it pulls in models
+from voting.live import STREAM_PATH, sse_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and STREAM_PATH.match(scope['path']):
+        await sse_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
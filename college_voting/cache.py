@@ -0,0 +1,206 @@
+"""
+Two-level cache tier and namespaced, versioned keys.
+
+``TieredCache`` is the ``default`` cache backend (see ``CACHES`` in
+settings.py). It puts a per-process LRU (``LocMemCache``, alias ``local``) in
+front of an optional shared backend (a ``FileBasedCache`` under
+``CACHE_SHARED_DIR``, alias ``shared``) that every worker on the host reads.
+Writes go to both tiers. A local hit never touches the shared tier, and a
+shared hit is copied into the local tier for at most ``CACHE_LOCAL_TTL``
+seconds, which bounds how stale another process's copy can get. Without a
+shared backend the local tier keeps values for their full timeout.
+
+Cached data is grouped per model into namespaces (``elections``,
+``candidates``). Every key embeds its namespace's current version, so
+``bump()`` invalidates a whole namespace at once by changing the version;
+the old entries are simply never read again and age out. Admin write views
+bump the namespaces they change. Versions live in the cache too, so without
+a shared backend a bump only reaches the process that made it. Namespaced
+values are then kept for ``CACHE_LOCAL_TTL`` seconds only
+(``namespace_timeout()``), which bounds how long other processes serve them.
+
+``cached()`` adds stampede protection: when a key is missing, one thread
+per process, and one process per host through a lock key in the shared
+tier, recomputes it while the others wait briefly for the result.
+"""
+import threading
+import time
+import uuid
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+ELECTIONS = 'elections'
+CANDIDATES = 'candidates'
+NAMESPACES = (ELECTIONS, CANDIDATES)
+
+# How long a recompute may hold the lock, and how long others wait for it
+LOCK_TIMEOUT = 30  # seconds
+LOCK_WAIT = 5  # seconds
+LOCK_POLL = 0.05  # seconds
+
+_MISSING = object()
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend reading a local tier first and a shared tier second.
+
+    OPTIONS: ``LOCAL`` and ``SHARED`` name the tier aliases in ``CACHES``
+    (``SHARED`` may be None) and ``LOCAL_TTL`` caps how long values read
+    from the shared tier are kept locally. Keys are passed to the tiers
+    unchanged; each tier applies its own key prefix and version.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._local_alias = options.get('LOCAL', 'local')
+        self._shared_alias = options.get('SHARED')
+        self.local_ttl = options.get('LOCAL_TTL', 5)
+
+    @property
+    def local(self):
+        return caches[self._local_alias]
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias] if self._shared_alias else None
+
+    def _local_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if self.shared is None:
+            return timeout
+        return self.local_ttl if timeout is None else min(timeout, self.local_ttl)
+
+    def get(self, key, default=None, version=None):
+        value = self.local.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if self.shared is not None:
+            value = self.shared.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                self.local.set(key, value, self.local_ttl, version=version)
+                return value
+        return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if self.shared is not None:
+            self.shared.set(key, value, timeout, version=version)
+        self.local.set(key, value, self._local_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if self.shared is None:
+            return self.local.add(key, value, timeout, version=version)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.local.set(key, value, self._local_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        if self.shared is None:
+            return self.local.touch(key, timeout, version=version)
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        deleted = self.local.delete(key, version=version)
+        if self.shared is not None:
+            deleted = self.shared.delete(key, version=version) or deleted
+        return deleted
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def close(self, **kwargs):
+        if self.shared is not None:
+            self.shared.close(**kwargs)
+
+
+def get_cache():
+    return caches[DEFAULT_CACHE_ALIAS]
+
+
+def _version_key(namespace):
+    return f'ns:{namespace}:version'
+
+
+def namespace_version(namespace):
+    cache = get_cache()
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # First use: whichever process adds first wins
+        cache.add(_version_key(namespace), uuid.uuid4().hex[:12], None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def bump(*namespaces):
+    """Invalidate every key in the given namespaces"""
+    cache = get_cache()
+    for namespace in namespaces:
+        # A fresh random version rather than incr(), which is not atomic here
+        cache.set(_version_key(namespace), uuid.uuid4().hex[:12], None)
+
+
+def namespace_timeout(timeout=DEFAULT_TIMEOUT):
+    """
+    Timeout for a value cached under a namespace: capped at the local TTL
+    when there is no shared tier, since other processes never see a bump.
+    """
+    cache = get_cache()
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = cache.default_timeout
+    if isinstance(cache, TieredCache) and cache.shared is None:
+        return cache.local_ttl if timeout is None else min(timeout, cache.local_ttl)
+    return timeout
+
+
+def make_key(namespace, *parts):
+    return ':'.join([namespace, namespace_version(namespace), *map(str, parts)])
+
+
+# Striped per-process locks, so concurrent misses on a key compute it once
+_key_locks = [threading.Lock() for _ in range(64)]
+
+
+def cached(namespace, parts, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the cached value for ``parts`` in ``namespace``, computing and
+    storing it with ``compute()`` on a miss.
+    """
+    timeout = namespace_timeout(timeout)
+    cache = get_cache()
+    key = make_key(namespace, *parts)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    with _key_locks[hash(key) % len(_key_locks)]:
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f'{key}:lock'
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        if not locked:
+            # Another process is computing it; wait for its result
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return value
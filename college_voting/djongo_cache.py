@@ -0,0 +1,115 @@
+"""
+Parse cache for djongo's SQL translation.
+
+djongo turns every ORM query into SQL, parses it with sqlparse and walks the
+parse tree to build the Mongo command, binding the query parameters as it
+goes. Django always passes the SQL as a parameterized template (``%s``
+placeholders, values separate), so the parse tree for a given template never
+changes; only the bound values do. Parsing is by far the most expensive step
+of the translation, so the ``sqlparse`` name djongo's translator modules use
+is replaced with a bounded LRU cache keyed by the SQL text, and translation
+then runs on the cached tree with the new parameters. djongo only reads the
+tree, so it is safe to share between executions and threads.
+
+Installed from ``VotingConfig.ready()`` when ``DJONGO_PARSE_CACHE`` is on and
+the default database is djongo (collectstatic runs against sqlite).
+"""
+import logging
+import threading
+from collections import OrderedDict
+from importlib import import_module
+
+logger = logging.getLogger(__name__)
+
+# djongo modules that do `from sqlparse import parse as sqlparse`
+PATCHED_MODULES = (
+    'djongo.sql2mongo.query',
+    'djongo.sql2mongo.converters',
+    'djongo.sql2mongo.sql_tokens',
+)
+
+
+class ParseCache:
+    """Thread-safe LRU of sqlparse results keyed by SQL text"""
+
+    def __init__(self, parse, max_size=512):
+        self._parse = parse
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, sql, encoding=None):
+        with self._lock:
+            statements = self._entries.get(sql)
+            if statements is not None:
+                self._entries.move_to_end(sql)
+                self.hits += 1
+                return statements
+            self.misses += 1
+
+        statements = tuple(self._parse(sql, encoding))
+        with self._lock:
+            self._entries[sql] = statements
+            self._entries.move_to_end(sql)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return statements
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache = None
+_originals = {}
+
+
+def install(max_size=512):
+    """Route djongo's SQL parsing through a ParseCache; returns the cache"""
+    global _cache
+    if _cache is not None:
+        return _cache
+    import sqlparse
+    # The translator modules import djongo.cursor, which imports them back;
+    # loading them first, without the backend, fails on that cycle
+    import_module('djongo.base')
+    cache = ParseCache(sqlparse.parse, max_size=max_size)
+    for name in PATCHED_MODULES:
+        module = import_module(name)
+        if getattr(module, 'sqlparse', None) is not sqlparse.parse:
+            # A djongo version laid out differently; leave that module alone
+            logger.warning("djongo parse cache: %s has no sqlparse reference to patch", name)
+            continue
+        _originals[name] = module.sqlparse
+        module.sqlparse = cache
+    _cache = cache
+    return cache
+
+
+def uninstall():
+    global _cache
+    for name, original in _originals.items():
+        import_module(name).sqlparse = original
+    _originals.clear()
+    _cache = None
+
+
+def parse_cache_stats():
+    """Counters of the installed cache, or None when it is not installed"""
+    return _cache.stats() if _cache is not None else None
@@ -1,21 +1,43 @@
+import asyncio
 import traceback
+from asgiref.sync import sync_to_async
 from django.http import HttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
 
 class GlobalErrorHandlingMiddleware:
+    # Async-capable, otherwise under ASGI Django runs every request through
+    # this middleware on its single sync thread, one request at a time
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, as MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
 
     def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
         try:
             response = self.get_response(request)
             return response
         except Exception:
-            # Catch ALL errors and show traceback
-            error_msg = traceback.format_exc()
-            return HttpResponse(
-                f"<html><body><h1>CRITICAL SERVER ERROR (Debug Mode - Status 200)</h1><pre>{error_msg}</pre></body></html>",
-                status=200 # Force 200 to bypass Vercel's 500 page
-            )
+            return self._error_response()
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        except Exception:
+            return self._error_response()
+
+    def _error_response(self):
+        # Catch ALL errors and show traceback
+        error_msg = traceback.format_exc()
+        return HttpResponse(
+            f"<html><body><h1>CRITICAL SERVER ERROR (Debug Mode - Status 200)</h1><pre>{error_msg}</pre></body></html>",
+            status=200 # Force 200 to bypass Vercel's 500 page
+        )
 
     def process_exception(self, request, exception):
         # Also catch view exceptions
@@ -24,3 +46,29 @@ class GlobalErrorHandlingMiddleware:
             f"<html><body><h1>VIEW EXCEPTION (Debug Mode)</h1><pre>{error_msg}</pre></body></html>",
             status=500
         )
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise's middleware, made async-capable for the same reason"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            # Opening the file blocks, so do it off the event loop
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,73 @@
+"""
+Direct pymongo access for hot paths that should not go through djongo's
+SQL translation. Everything here reuses the MongoClient that djongo already
+opened for the current thread, so there is no second set of credentials or
+connection settings to keep in sync.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from bson import ObjectId
+from django.conf import settings
+from django.db import connections
+from django.db.models import DEFERRED, DateTimeField
+
+
+def get_db(alias='default'):
+    """Return the pymongo Database behind the djongo connection"""
+    connection = connections[alias]
+    connection.ensure_connection()
+    return connection.connection
+
+
+def get_collection(model_or_name, alias='default'):
+    """Return the collection for a model class (its db_table) or a raw name"""
+    name = model_or_name if isinstance(model_or_name, str) else model_or_name._meta.db_table
+    return get_db(alias)[name]
+
+
+def model_to_document(instance, alias='default'):
+    """
+    Build the document djongo would insert for ``instance``.
+
+    Runs each field's ``pre_save`` (so auto_now_add timestamps are filled and
+    uncommitted files are written to storage) and its database preparation,
+    and assigns a fresh ObjectId primary key if the instance has none.
+    """
+    connection = connections[alias]
+    opts = instance._meta
+    if getattr(instance, opts.pk.attname) is None:
+        setattr(instance, opts.pk.attname, ObjectId())
+
+    document = {}
+    for field in opts.concrete_fields:
+        value = field.pre_save(instance, True)
+        document[field.column] = field.get_db_prep_save(value, connection=connection)
+    return document
+
+
+def mark_saved(instance, alias='default'):
+    """Flag an instance inserted through pymongo as persisted"""
+    instance._state.adding = False
+    instance._state.db = alias
+
+
+def document_to_instance(model, document, fields=None, alias='default'):
+    """
+    Build a model instance from a document read through pymongo, as djongo
+    would have loaded it: columns missing from the document load as None.
+    When the document was read with a projection, pass the projected
+    ``fields`` and the others are deferred instead.
+    """
+    loaded = None if fields is None else {model._meta.get_field(f).attname for f in fields}
+    names, values = [], []
+    for field in model._meta.concrete_fields:
+        names.append(field.attname)
+        if loaded is not None and not field.primary_key and field.attname not in loaded:
+            value = DEFERRED
+        else:
+            value = document.get(field.column)
+        if isinstance(field, DateTimeField) and isinstance(value, datetime) and settings.USE_TZ:
+            # pymongo returns naive UTC datetimes
+            value = value.replace(tzinfo=dt_timezone.utc)
+        values.append(value)
+    return model.from_db(alias, names, values)
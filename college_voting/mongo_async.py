@@ -0,0 +1,43 @@
+"""
+Non-blocking MongoDB access for the async views (voting/async_views.py).
+
+djongo and the pymongo helpers in college_voting/mongo.py block the calling
+thread, and Django refuses to open its database connection from async code
+at all. Async views use pymongo's own ``AsyncMongoClient`` instead, so one
+pymongo release serves both paths, configured from the same ``DATABASES``
+entry as djongo so there is no second set of credentials.
+
+An async client belongs to the event loop it was created on, so one client
+is kept per running loop. An ASGI server runs a single loop per worker
+process; under WSGI every async view would get a throwaway loop, which is
+why the async views are only enabled for ASGI deployments.
+"""
+import asyncio
+import weakref
+
+from django.conf import settings
+from pymongo import AsyncMongoClient
+
+_clients = weakref.WeakKeyDictionary()  # event loop -> {alias: client}
+
+
+def get_async_client(alias='default'):
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    if alias not in clients:
+        options = dict(settings.DATABASES[alias].get('CLIENT', {}))
+        # Listeners there (pool metrics) are for djongo's client only
+        options.pop('event_listeners', None)
+        # One pool is shared by every in-flight request of the process
+        options['maxPoolSize'] = getattr(settings, 'ASYNC_MONGO_MAX_POOL_SIZE', 100)
+        clients[alias] = AsyncMongoClient(**options)
+    return clients[alias]
+
+
+def get_async_db(alias='default'):
+    return get_async_client(alias)[settings.DATABASES[alias]['NAME']]
+
+
+def get_async_collection(model_or_name, alias='default'):
+    """Return the async collection for a model class (its db_table) or a raw name"""
+    name = model_or_name if isinstance(model_or_name, str) else model_or_name._meta.db_table
+    return get_async_db(alias)[name]
@@ -0,0 +1,185 @@
+"""
+Connection pool warm-up, heartbeat and metrics for the shared MongoClient.
+
+djongo keeps one MongoClient per process, shared by every request thread.
+Under the ``server`` profile (``MONGO_PROFILE``, see settings.py) that client
+has a real pool; ``prewarm()`` opens its minimum number of connections when a
+worker boots and ``start_heartbeat()`` pings the server periodically so idle
+connections are not silently dropped by load balancers or NAT.
+
+``PoolMetrics`` is a pymongo connection pool listener recording checkout
+wait times, connections in use and checkout failures, i.e. how often
+requests queue for a connection and for how long. Its ``snapshot()`` is
+served as JSON to admins; use it to size ``MONGO_MAX_POOL_SIZE`` against
+the number of worker threads. It is attached to djongo's client only, so the
+async driver's pool (college_voting/mongo_async.py) is not mixed in.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from pymongo import common, monitoring
+
+from college_voting.mongo import get_db
+
+logger = logging.getLogger(__name__)
+
+# Checkout waits at or above these are counted separately (milliseconds)
+SLOW_WAIT_MS = (10, 100, 1000)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = threading.local()
+        self.max_pool_size = None
+        self.open = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.checkout_failures = {}
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.slow_waits = dict.fromkeys(SLOW_WAIT_MS, 0)
+        self.saturated_checkouts = 0
+        self.last_heartbeat_ms = None
+        self.heartbeat_failures = 0
+
+    def pool_created(self, event):
+        with self._lock:
+            # Only options that differ from the defaults are reported
+            self.max_pool_size = event.options.get('maxPoolSize', common.MAX_POOL_SIZE)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.perf_counter()
+        with self._lock:
+            # Every connection was busy when this request asked for one
+            if self.max_pool_size and self.in_use >= self.max_pool_size:
+                self.saturated_checkouts += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._started, 'at', None)
+        waited_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.wait_total_ms += waited_ms
+            self.wait_max_ms = max(self.wait_max_ms, waited_ms)
+            for threshold in SLOW_WAIT_MS:
+                if waited_ms >= threshold:
+                    self.slow_waits[threshold] += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def record_heartbeat(self, elapsed_ms):
+        with self._lock:
+            if elapsed_ms is None:
+                self.heartbeat_failures += 1
+            else:
+                self.last_heartbeat_ms = round(elapsed_ms, 2)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'max_pool_size': self.max_pool_size,
+                'open': self.open,
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'saturation': round(self.in_use / self.max_pool_size, 3) if self.max_pool_size else None,
+                'checkouts': self.checkouts,
+                'saturated_checkouts': self.saturated_checkouts,
+                'wait_avg_ms': round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max_ms, 3),
+                'waits_over_ms': {str(k): v for k, v in self.slow_waits.items()},
+                'checkout_failures': dict(self.checkout_failures),
+                'last_heartbeat_ms': self.last_heartbeat_ms,
+                'heartbeat_failures': self.heartbeat_failures,
+            }
+
+
+pool_metrics = PoolMetrics()
+_installed = False
+
+
+def install_pool_metrics(alias='default'):
+    """Attach the listener to djongo's client; must run before it is created"""
+    global _installed
+    if not _installed:
+        # djongo passes CLIENT to MongoClient(); a global monitoring.register()
+        # would also count every other client in the process
+        client = settings.DATABASES[alias].setdefault('CLIENT', {})
+        client['event_listeners'] = [*client.get('event_listeners', []), pool_metrics]
+        _installed = True
+
+
+def _ping():
+    started = time.perf_counter()
+    get_db().command('ping')
+    return (time.perf_counter() - started) * 1000
+
+
+def prewarm(connections):
+    """Open ``connections`` pooled connections now instead of on first use"""
+    _ping()
+    if connections > 1:
+        # Concurrent pings each need their own connection
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(lambda _: _ping(), range(connections)))
+    logger.info("Pre-warmed %d MongoDB connection(s) in process %d", connections, os.getpid())
+
+
+_heartbeat = None
+_heartbeat_pid = None
+
+
+def _run_heartbeat(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            pool_metrics.record_heartbeat(_ping())
+        except Exception as e:
+            pool_metrics.record_heartbeat(None)
+            logger.warning("MongoDB heartbeat failed: %s", e)
+
+
+def start_heartbeat(interval):
+    """Ping the server every ``interval`` seconds in a daemon thread"""
+    global _heartbeat, _heartbeat_pid
+    if interval <= 0:
+        return
+    # Threads don't survive a fork, so start one per worker process
+    if _heartbeat is None or _heartbeat_pid != os.getpid() or not _heartbeat.is_alive():
+        _heartbeat_pid = os.getpid()
+        _heartbeat = threading.Thread(target=_run_heartbeat, args=(interval,), name='mongo-heartbeat', daemon=True)
+        _heartbeat.start()
@@ -0,0 +1,155 @@
+"""
+Session engine storing sessions directly in MongoDB.
+
+Sessions live in their own collection (``SESSION_MONGO_COLLECTION``) as
+``{_id: session_key, data, expire_date}`` and are read and written with
+pymongo instead of through djongo. A TTL index on ``expire_date`` lets the
+server delete expired sessions, so ``clearsessions`` is not needed.
+
+With ``SESSION_SAVE_EVERY_REQUEST`` the session middleware saves on every
+response to slide the expiry forward. ``SessionStore.save()`` skips that
+write when the session data is unchanged and the stored expiry is less than
+``SESSION_WRITE_INTERVAL`` seconds behind the new one. An idle session
+therefore expires between ``SESSION_COOKIE_AGE - SESSION_WRITE_INTERVAL``
+and ``SESSION_COOKIE_AGE`` seconds after the last request.
+
+Enabled with ``SESSION_ENGINE = 'college_voting.mongo_sessions'``. Async
+views load sessions with ``SessionStore.aload()`` through the async driver.
+"""
+import hashlib
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, SessionBase, UpdateError
+from django.utils import timezone
+from pymongo.errors import DuplicateKeyError
+
+from college_voting.mongo import get_collection
+
+EXPIRY_INDEX_NAME = 'sessions_expire_date_ttl'
+
+_index_ready = False
+_index_lock = threading.Lock()
+
+
+def session_collection_name():
+    return getattr(settings, 'SESSION_MONGO_COLLECTION', 'sessions')
+
+
+def get_session_collection():
+    collection = get_collection(session_collection_name())
+    ensure_session_index(collection)
+    return collection
+
+
+def ensure_session_index(collection):
+    global _index_ready
+    if _index_ready:
+        return
+    with _index_lock:
+        if not _index_ready:
+            # Documents are removed once expire_date has passed
+            collection.create_index('expire_date', expireAfterSeconds=0, name=EXPIRY_INDEX_NAME)
+            _index_ready = True
+
+
+class SessionStore(SessionBase):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Fingerprint and expiry of the stored copy; None until loaded or written
+        self._stored_fingerprint = None
+        self._stored_expiry = None
+
+    def _fingerprint(self, data):
+        return hashlib.sha1(self.serializer().dumps(data)).hexdigest()
+
+    def _as_aware(self, value):
+        # pymongo returns naive UTC datetimes
+        if settings.USE_TZ and timezone.is_naive(value):
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    def _query(self):
+        return {'_id': self.session_key, 'expire_date': {'$gt': timezone.now()}}
+
+    def load(self):
+        doc = None
+        if self.session_key is not None:
+            doc = get_session_collection().find_one(self._query())
+        return self._from_document(doc)
+
+    async def aload(self):
+        """Load the session through the async driver, as load() would"""
+        from college_voting.mongo_async import get_async_collection
+
+        doc = None
+        if self.session_key is not None:
+            doc = await get_async_collection(session_collection_name()).find_one(self._query())
+        self._session_cache = self._from_document(doc)
+        return self._session_cache
+
+    def _from_document(self, doc):
+        if doc is None:
+            self._session_key = None
+            return {}
+        # decode() returns {} for tampered or unreadable data
+        data = self.decode(doc['data'])
+        self._stored_fingerprint = self._fingerprint(data)
+        self._stored_expiry = self._as_aware(doc['expire_date'])
+        return data
+
+    def exists(self, session_key):
+        return get_session_collection().find_one({'_id': session_key}, {'_id': 1}) is not None
+
+    def create(self):
+        while True:
+            self._session_key = self._get_new_session_key()
+            try:
+                self.save(must_create=True)
+            except CreateError:
+                # Key collision; try another one
+                continue
+            self.modified = True
+            return
+
+    def _needs_write(self, data, expire_date):
+        if self._stored_fingerprint is None or self._fingerprint(data) != self._stored_fingerprint:
+            return True
+        interval = timedelta(seconds=getattr(settings, 'SESSION_WRITE_INTERVAL', 300))
+        return expire_date - self._stored_expiry >= interval
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        expire_date = self.get_expiry_date()
+        if not must_create and not self._needs_write(data, expire_date):
+            return
+        doc = {'_id': self._session_key, 'data': self.encode(data), 'expire_date': expire_date}
+        collection = get_session_collection()
+        if must_create:
+            try:
+                collection.insert_one(doc)
+            except DuplicateKeyError:
+                raise CreateError
+        elif collection.replace_one({'_id': doc['_id']}, doc).matched_count == 0:
+            # Deleted by a concurrent request (e.g. logout)
+            raise UpdateError
+        self._stored_fingerprint = self._fingerprint(data)
+        self._stored_expiry = expire_date
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        get_session_collection().delete_one({'_id': session_key})
+        if session_key == self.session_key:
+            self._stored_fingerprint = None
+            self._stored_expiry = None
+
+    @classmethod
+    def clear_expired(cls):
+        # The TTL monitor runs about once a minute; remove the stragglers
+        get_session_collection().delete_many({'expire_date': {'$lt': timezone.now()}})
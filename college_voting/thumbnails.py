@@ -0,0 +1,104 @@
+"""
+Content-addressed thumbnails for profile and voter photos.
+
+List pages used to inline every full-size photo as a base64 data URI, which
+the browser can never cache. Instead each source image is rendered once into
+small fixed-size variants stored as ``thumbs/<sha256>_<size>.<ext>``. Since
+the name is derived from the image bytes, a URL never changes meaning and is
+served with a one-year immutable cache lifetime.
+
+Models keep only the reference ``<sha256>.<ext>``; ``thumbnail_url(ref,
+size)`` turns it into a URL.
+"""
+import base64
+import hashlib
+import io
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from PIL import Image, ImageOps, features
+
+THUMB_DIR = 'thumbs'
+# Square variants: avatar lists and detail modals
+THUMB_SIZES = {'sm': 96, 'md': 320}
+QUALITY = 80
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+THUMB_NAME = re.compile(r'^(?P<digest>[0-9a-f]{64})_(?P<size>[a-z]+)\.(?P<ext>webp|jpg)$')
+
+
+def _output_format():
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def _thumb_name(digest, size, ext):
+    return f'{THUMB_DIR}/{digest}_{size}.{ext}'
+
+
+def make_thumbnails(data):
+    """
+    Render every thumbnail size for the image bytes ``data`` (skipping sizes
+    already stored) and return the reference to store on the model.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    image_format, ext = _output_format()
+    source = None
+    for size, pixels in THUMB_SIZES.items():
+        name = _thumb_name(digest, size, ext)
+        if default_storage.exists(name):
+            continue
+        if source is None:
+            source = Image.open(io.BytesIO(data))
+            source = ImageOps.exif_transpose(source)
+            if source.mode != 'RGB':
+                source = source.convert('RGB')
+        thumb = ImageOps.fit(source, (pixels, pixels))
+        buffer = io.BytesIO()
+        thumb.save(buffer, image_format, quality=QUALITY)
+        default_storage.save(name, ContentFile(buffer.getvalue()))
+    return f'{digest}.{ext}'
+
+
+def thumbnails_from_data_uri(data_uri):
+    """make_thumbnails() for a ``data:image/...;base64,`` string"""
+    _, encoded = data_uri.split(';base64,', 1)
+    return make_thumbnails(base64.b64decode(encoded))
+
+
+def thumbnails_from_storage(name):
+    """make_thumbnails() for a file in default storage"""
+    with default_storage.open(name, 'rb') as f:
+        return make_thumbnails(f.read())
+
+
+def thumbnail_url(ref, size='sm'):
+    """URL of one size of a stored thumbnail reference, or None"""
+    if not ref:
+        return None
+    digest, ext = ref.split('.', 1)
+    return reverse('thumbnail', args=[f'{digest}_{size}.{ext}'])
+
+
+@require_GET
+def serve_thumbnail(request, name):
+    """Serve a thumbnail with long-lived cache headers"""
+    match = THUMB_NAME.match(name)
+    if not match or match.group('size') not in THUMB_SIZES:
+        raise Http404('Unknown thumbnail')
+
+    etag = f'"{match.group("digest")}_{match.group("size")}"'
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+        response = HttpResponseNotModified()
+    else:
+        path = f'{THUMB_DIR}/{name}'
+        if not default_storage.exists(path):
+            raise Http404('Unknown thumbnail')
+        content_type = 'image/webp' if match.group('ext') == 'webp' else 'image/jpeg'
+        response = FileResponse(default_storage.open(path, 'rb'), content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+    return response
@@ -22,6 +22,7 @@ from django.shortcuts import redirect
 from django.views.generic import TemplateView
 from django.views.static import serve
 from accounts import views as account_views
+from college_voting.thumbnails import serve_thumbnail
 import os
 
 urlpatterns = [
@@ -32,6 +33,7 @@ urlpatterns = [
     path('accounts/', include('accounts.urls')),
     path('', include('voting.urls')),
     path('admin/', admin.site.urls),
+    path('thumbs/<str:name>', serve_thumbnail, name='thumbnail'),
     # SEO files
     path('robots.txt', lambda request: serve(request, 'robots.txt', document_root=os.path.join(settings.BASE_DIR, 'static'))),
     path('sitemap.xml', lambda request: serve(request, 'sitemap.xml', document_root=os.path.join(settings.BASE_DIR, 'static'))),
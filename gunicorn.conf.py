@@ -0,0 +1,32 @@
+"""
+gunicorn configuration for running the app as a long-lived server:
+
+    gunicorn college_voting.wsgi -c gunicorn.conf.py
+
+Selects the pooled ``server`` MongoDB profile (see settings.py) unless
+MONGO_PROFILE is set, shares the cache tier between workers through a
+file-based cache (CACHE_SHARED_DIR), and warms each worker's connection
+pool before it accepts requests.
+"""
+import os
+
+os.environ.setdefault('MONGO_PROFILE', 'server')
+os.environ.setdefault('CACHE_SHARED_DIR', '/tmp/votehub-cache')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 60
+
+
+def post_worker_init(worker):
+    """Runs in each worker once the Django application is loaded"""
+    from django.conf import settings
+    from college_voting.mongo_pool import prewarm, start_heartbeat
+
+    try:
+        prewarm(settings.MONGO_POOL_OPTIONS.get('minPoolSize') or 1)
+    except Exception as e:
+        worker.log.warning("MongoDB pre-warm failed: %s", e)
+    start_heartbeat(settings.MONGO_HEARTBEAT_INTERVAL)
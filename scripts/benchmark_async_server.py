@@ -0,0 +1,168 @@
+"""
+Benchmark the async student views under ASGI against the sync views under
+gunicorn's threaded workers.
+
+Starts each server in turn on a local port:
+
+* sync:  gunicorn college_voting.wsgi -c gunicorn.conf.py (gthread workers)
+* async: gunicorn college_voting.asgi:application -c gunicorn.conf.py
+         -k uvicorn.workers.UvicornWorker, with VOTING_ASYNC_VIEWS=1
+
+It then holds --concurrency clients in flight against the student dashboard
+(and the ballot page when --election is given) for --duration seconds per
+level, and reports throughput, latency percentiles and errors. Both servers
+get the same number of worker processes. Requests are signed in as --email
+through a session created for the run and deleted afterwards. Reads only, no
+ballots are cast. Raise the open-file limit (ulimit -n) for thousands of
+clients.
+
+Usage:
+    python scripts/benchmark_async_server.py --email student@sfscollege.in [--election ID]
+        [--concurrency 50,500,2000] [--duration 15] [--workers 2]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import django
+
+# Setup Django
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
+django.setup()
+
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+from accounts.models import User
+
+HOST = '127.0.0.1'
+SERVERS = (
+    ('sync (gthread)', 8101, ['college_voting.wsgi'], {'VOTING_ASYNC_VIEWS': '0'}),
+    ('async (uvicorn)', 8102, ['college_voting.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+     {'VOTING_ASYNC_VIEWS': '1'}),
+)
+
+
+def make_session(user):
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    store[SESSION_KEY] = str(user.pk)
+    store[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    store.save()
+    return store
+
+
+def start_server(port, args, env, workers):
+    command = ['gunicorn', *args, '-c', str(BASE_DIR / 'gunicorn.conf.py'),
+               '--bind', f'{HOST}:{port}', '--workers', str(workers)]
+    return subprocess.Popen(command, cwd=BASE_DIR, env={**os.environ, **env},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def fetch(port, path, cookie, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(HOST, port), timeout)
+    try:
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\nCookie: {cookie}\r\n'
+                     f'Connection: close\r\n\r\n'.encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await fetch(port, '/', '', 5)
+            return True
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            await asyncio.sleep(0.5)
+    return False
+
+
+async def run_load(port, paths, cookie, concurrency, duration, timeout=30):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def client(n):
+        nonlocal errors
+        i = n
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, path, cookie, timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                errors += 1
+                continue
+            if status == 200:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client(n) for n in range(concurrency)))
+    elapsed = time.monotonic() - started
+    return latencies, errors, elapsed
+
+
+def percentile(samples, q):
+    return samples[min(int(len(samples) * q), len(samples) - 1)] if samples else 0.0
+
+
+async def benchmark(args, paths, cookie):
+    print(f"{'server':<18} {'clients':>8} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>8}")
+    for label, port, server_args, env in SERVERS:
+        process = start_server(port, server_args, env, args.workers)
+        try:
+            if not await wait_until_up(port):
+                print(f"{label:<18} failed to start")
+                continue
+            for concurrency in args.concurrency:
+                latencies, errors, elapsed = await run_load(port, paths, cookie, concurrency, args.duration)
+                latencies.sort()
+                print(f"{label:<18} {concurrency:>8} {len(latencies) / elapsed:>9.1f} "
+                      f"{percentile(latencies, 0.5):>7.1f}ms {percentile(latencies, 0.95):>7.1f}ms "
+                      f"{percentile(latencies, 0.99):>7.1f}ms {errors:>8}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--email', required=True, help='Student account to sign in as')
+    parser.add_argument('--election', help='Also load the ballot page of this election (one the student has not voted in)')
+    parser.add_argument('--concurrency', type=lambda v: [int(n) for n in v.split(',')], default=[50, 500, 2000])
+    parser.add_argument('--duration', type=int, default=15, help='seconds per concurrency level')
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    user = User.objects.filter(email=args.email).first()
+    if user is None or user.is_admin:
+        print(f"No student account {args.email}.")
+        return
+    paths = ['/dashboard/'] + ([f'/vote/{args.election}/'] if args.election else [])
+    session = make_session(user)
+    cookie = f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+    print(f"{args.workers} worker(s) per server, {args.duration}s per level, paths: {', '.join(paths)}\n")
+    try:
+        asyncio.run(benchmark(args, paths, cookie))
+    finally:
+        session.delete()
+
+
+if __name__ == '__main__':
+    main()
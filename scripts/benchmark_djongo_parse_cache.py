@@ -0,0 +1,88 @@
+"""
+Benchmark djongo's SQL-to-Mongo translation with and without the parse
+cache (college_voting/djongo_cache.py).
+
+Compiles the ORM queries issued by voting/views.py and voting/admin_views.py
+to the SQL and parameters Django hands to djongo, then times djongo's
+translation of each one, with fresh parameter values every iteration as in
+production. Only the translation is timed; no query reaches MongoDB.
+
+Usage:
+    python scripts/benchmark_djongo_parse_cache.py [--iterations 500]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import django
+
+# Setup Django
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
+django.setup()
+
+from bson import ObjectId
+from django.db import connection
+from djongo.sql2mongo.query import Query
+
+from accounts.models import User
+from college_voting import djongo_cache
+from voting.admin_views import RESULT_CANDIDATE_FIELDS, STUDENT_LIST_FIELDS
+from voting.models import Candidate, Election, Vote
+
+
+def sample_querysets():
+    election_id = str(ObjectId())
+    email = 'student@example.com'
+    return [
+        ('elections newest first', Election.objects.all().order_by('-created_at')),
+        ('election by _id', Election.objects.filter(_id=ObjectId())[:1]),
+        ('candidates of election', Candidate.objects.filter(election_id=election_id)),
+        ('results candidates', Candidate.objects.filter(election_id=election_id).only(*RESULT_CANDIDATE_FIELDS)),
+        ('candidate in election', Candidate.objects.filter(_id=ObjectId(), election_id=election_id)[:1]),
+        ('has voted', Vote.objects.filter(election_id=election_id, voter_email=email)[:1]),
+        ('voted elections', Vote.objects.filter(voter_email=email).values_list('election_id', flat=True)),
+        ('student list', User.objects.only(*STUDENT_LIST_FIELDS)),
+        ('user by email', User.objects.filter(email=email)[:1]),
+    ]
+
+
+def compile_sql(queryset):
+    return queryset.query.get_compiler(connection=connection).as_sql()
+
+
+def time_translation(sql, params, iterations):
+    # Vary the first parameter like real traffic; the SQL template stays the same
+    start = time.perf_counter()
+    for i in range(iterations):
+        bound = list(params)
+        if bound and isinstance(bound[0], str):
+            bound[0] = f'{bound[0]}-{i}'
+        Query(None, None, None, sql, bound)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    queries = [(label, *compile_sql(qs)) for label, qs in sample_querysets()]
+
+    djongo_cache.uninstall()
+    uncached = [time_translation(sql, params, args.iterations) for _, sql, params in queries]
+    cache = djongo_cache.install()
+    cached = [time_translation(sql, params, args.iterations) for _, sql, params in queries]
+
+    print(f"{'query':<26} {'uncached':>10} {'cached':>10} {'speedup':>8}")
+    for (label, _, _), before, after in zip(queries, uncached, cached):
+        print(f"{label:<26} {before:>8.3f}ms {after:>8.3f}ms {before / after:>7.1f}x")
+    print(f"\nTotal per page-worth of queries: {sum(uncached):.2f}ms -> {sum(cached):.2f}ms")
+    print(f"Cache: {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main()
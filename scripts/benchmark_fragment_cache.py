@@ -0,0 +1,140 @@
+"""
+Benchmark rendering of the student vote page and dashboard with and without
+the cached template fragments.
+
+Renders templates/student/vote.html for an election with --candidates
+candidates and templates/student/dashboard.html with --elections election
+cards, built in memory, so no database is needed. "uncached" renders with a
+dummy cache, so every fragment is rendered every time; "cached" renders with
+the configured cache tier after one warm-up render, so only the per-student
+parts are rendered.
+
+Usage:
+    python scripts/benchmark_fragment_cache.py [--candidates 20] [--elections 6] [--iterations 500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+# Setup Django
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
+django.setup()
+
+from bson import ObjectId
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from college_voting.cache import CANDIDATES, ELECTIONS, namespace_timeout, namespace_version
+from voting.election_catalog import ACTIVE
+from voting.models import Candidate, Election
+
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def make_request():
+    request = RequestFactory().get('/student/dashboard/')
+    request.user = User(email='student@sfscollege.in', full_name='Benchmark Student', student_id='BENCH001')
+    request.session = SessionStore()
+    request._messages = FallbackStorage(request)
+    return request
+
+
+def make_election(n):
+    now = timezone.now()
+    return Election(
+        _id=ObjectId(), title=f'Student Council Election {n}',
+        description='Choose the representatives for the coming academic year. ' * 4,
+        start_date=now - timedelta(days=1), end_date=now + timedelta(days=1),
+        created_by='admin@sfscollege.in', is_active=True,
+    )
+
+
+def make_candidates(election, count):
+    return [
+        Candidate(
+            _id=ObjectId(), election_id=str(election._id), name=f'Candidate {n}',
+            position='President', description='Committed to a better campus for every student. ' * 3,
+            image=f'candidates/candidate_{n}.jpg',
+        )
+        for n in range(count)
+    ]
+
+
+def vote_context(election, candidates):
+    return {
+        'election': election,
+        'candidates': lambda: candidates,
+        'elections_version': namespace_version(ELECTIONS),
+        'candidates_version': namespace_version(CANDIDATES),
+        'fragment_timeout': namespace_timeout(),
+    }
+
+
+def dashboard_context(request, elections):
+    return {
+        'user': request.user,
+        'elections': [
+            {'election': e, 'election_id': str(e._id), 'has_voted': n % 2 == 0,
+             'status': ACTIVE, 'can_vote': n % 2 == 1}
+            for n, e in enumerate(elections)
+        ],
+        'elections_version': namespace_version(ELECTIONS),
+        'fragment_timeout': namespace_timeout(),
+    }
+
+
+def time_render(template, make_context, iterations):
+    request = make_request()
+    render_to_string(template, make_context(request), request=request)  # warm up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        render_to_string(template, make_context(request), request=request)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--candidates', type=int, default=20)
+    parser.add_argument('--elections', type=int, default=6)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    election = make_election(0)
+    candidates = make_candidates(election, args.candidates)
+    elections = [make_election(n) for n in range(args.elections)]
+    pages = [
+        (f'vote ({args.candidates} candidates)', 'student/vote.html',
+         lambda request: vote_context(election, candidates)),
+        (f'dashboard ({args.elections} elections)', 'student/dashboard.html',
+         lambda request: dashboard_context(request, elections)),
+    ]
+
+    print(f"{args.iterations} renders per page\n")
+    print(f"{'page':<28} {'uncached':>10} {'p95':>8} {'cached':>10} {'p95':>8} {'speedup':>8}")
+    for label, template, make_context in pages:
+        with override_settings(CACHES=DUMMY_CACHES):
+            uncached_mean, uncached_p95 = time_render(template, make_context, args.iterations)
+        cached_mean, cached_p95 = time_render(template, make_context, args.iterations)
+        print(f"{label:<28} {uncached_mean:>8.3f}ms {uncached_p95:>6.3f}ms "
+              f"{cached_mean:>8.3f}ms {cached_p95:>6.3f}ms {uncached_mean / cached_mean:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
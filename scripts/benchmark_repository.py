@@ -0,0 +1,81 @@
+"""
+Benchmark the djongo and native pymongo repositories (voting/repository.py).
+
+Runs every read used by the student voting pages and the results page
+against the configured database through both implementations and reports
+the mean and p95 latency per call. Reads only; nothing is written.
+
+Usage:
+    python scripts/benchmark_repository.py [--iterations 200] [--election ID] [--email EMAIL]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import django
+from bson import ObjectId
+
+# Setup Django
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
+django.setup()
+
+from voting.admin_views import RESULT_CANDIDATE_FIELDS
+from voting.models import Candidate, Election, Vote
+from voting.repository import djongo_repository, native_repository
+
+
+def time_calls(call, iterations):
+    call()  # warm up connections and caches
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--election', help='Election id to read (default: newest election)')
+    parser.add_argument('--email', help='Voter email to read (default: a voter of the election)')
+    args = parser.parse_args()
+
+    election = (Election.objects.filter(_id=ObjectId(args.election)).first() if args.election
+                else Election.objects.order_by('-created_at').first())
+    if election is None:
+        print("No elections found.")
+        return
+    election_id = str(election._id)
+    vote = Vote.objects.filter(election_id=election_id).first()
+    email = args.email or (vote.voter_email if vote else 'nobody@example.com')
+    candidate = Candidate.objects.filter(election_id=election_id).first()
+    candidate_id = str(candidate._id) if candidate else str(election._id)
+
+    calls = [
+        ('active_elections', lambda repo: repo.active_elections()),
+        ('voted_election_ids', lambda repo: repo.voted_election_ids(email)),
+        ('has_voted', lambda repo: repo.has_voted(election_id, email)),
+        ('candidates', lambda repo: repo.candidates(election_id)),
+        ('candidates (results)', lambda repo: repo.candidates(election_id, RESULT_CANDIDATE_FIELDS)),
+        ('get_candidate', lambda repo: repo.get_candidate(candidate_id, election_id)),
+        ('get_vote', lambda repo: repo.get_vote(election_id, email)),
+    ]
+
+    print(f"Election {election_id}, voter {email}, {args.iterations} iterations per call\n")
+    print(f"{'call':<22} {'djongo mean':>12} {'p95':>8} {'native mean':>12} {'p95':>8} {'speedup':>8}")
+    for label, call in calls:
+        djongo_mean, djongo_p95 = time_calls(lambda: call(djongo_repository), args.iterations)
+        native_mean, native_p95 = time_calls(lambda: call(native_repository), args.iterations)
+        print(f"{label:<22} {djongo_mean:>10.2f}ms {djongo_p95:>6.2f}ms "
+              f"{native_mean:>10.2f}ms {native_p95:>6.2f}ms {djongo_mean / native_mean:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark per-vote inserts against group-committed inserts.
+
+Simulates a burst of concurrent ballots (one thread per in-flight request)
+against a scratch collection in the configured database, using the same
+write concern as the app. The scratch collection is dropped afterwards.
+
+Usage:
+    python scripts/benchmark_vote_writes.py [--threads 32] [--votes 2000] [--window-ms 5]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import django
+
+# Setup Django
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
+django.setup()
+
+from bson import ObjectId
+from django.utils import timezone
+from pymongo.errors import DuplicateKeyError
+
+from college_voting.mongo import get_db
+from voting.vote_service import VOTE_UNIQUE_INDEX, GroupCommitWriter
+
+SCRATCH_COLLECTION = 'votes_benchmark'
+
+
+def make_document(election_id, n):
+    return {
+        '_id': ObjectId(),
+        'election_id': election_id,
+        'candidate_id': str(ObjectId()),
+        'voter_email': f'voter{n}@sfscollege.in',
+        'voter_image': f'voter_images/voter{n}.jpeg',
+        'latitude': 12.9716,
+        'longitude': 77.5946,
+        'city': 'Bengaluru',
+        'country': 'India',
+        'ip_address': '127.0.0.1',
+        'voted_at': timezone.now(),
+    }
+
+
+def run(label, write_one, threads, votes):
+    election_id = str(ObjectId())
+    per_thread = votes // threads
+    results = {'inserted': 0, 'duplicate': 0}
+    lock = threading.Lock()
+
+    def worker(offset):
+        inserted = duplicate = 0
+        for i in range(per_thread):
+            # Every 50th ballot is a double-submit of the previous one
+            n = offset + i - 1 if i and i % 50 == 0 else offset + i
+            if write_one(make_document(election_id, n)):
+                inserted += 1
+            else:
+                duplicate += 1
+        with lock:
+            results['inserted'] += inserted
+            results['duplicate'] += duplicate
+
+    pool = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = results['inserted'] + results['duplicate']
+    print(f"{label:<14} {total:>6} ballots in {elapsed:7.2f}s  "
+          f"{total / elapsed:8.1f} votes/s  "
+          f"(inserted={results['inserted']}, duplicate={results['duplicate']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--votes', type=int, default=2000)
+    parser.add_argument('--window-ms', type=int, default=5)
+    parser.add_argument('--max-batch', type=int, default=100)
+    args = parser.parse_args()
+
+    db = get_db()
+    collection = db[SCRATCH_COLLECTION]
+    collection.drop()
+    collection.create_index(VOTE_UNIQUE_INDEX, unique=True)
+
+    def insert_one(document):
+        try:
+            collection.insert_one(document)
+        except DuplicateKeyError:
+            return False
+        return True
+
+    writer = GroupCommitWriter(lambda: collection, window_ms=args.window_ms, max_batch=args.max_batch)
+
+    try:
+        print(f"Benchmarking {args.votes} ballots from {args.threads} concurrent threads\n")
+        run('per-vote', insert_one, args.threads, args.votes)
+        run('group-commit', writer.submit, args.threads, args.votes)
+        print(f"\ngroup-commit wrote {writer.votes} votes in {writer.batches} batches "
+              f"(avg {writer.votes / max(writer.batches, 1):.1f} per insert_many)")
+    finally:
+        collection.drop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Load test the session engines: database writes per request.
+
+Runs simulated clients through Django's SessionMiddleware, once with the
+djongo-backed ``django.contrib.sessions.backends.db`` engine and once with
+``college_voting.mongo_sessions``, and counts the MongoDB commands each
+issues. Each client signs in (one session write) and then makes a series of
+page views that only read the session, as a student moving between the
+dashboard and a ballot does. SESSION_SAVE_EVERY_REQUEST is on, as in
+settings.py. The sessions created are deleted afterwards.
+
+Usage:
+    python scripts/load_test_sessions.py [--clients 50] [--requests 20] [--threads 8]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pymongo import monitoring
+
+WRITE_COMMANDS = {'insert', 'update', 'delete', 'findAndModify'}
+READ_COMMANDS = {'find', 'aggregate', 'count', 'getMore'}
+
+
+# Register before Django opens its MongoClient so the listener is attached
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.writes = 0
+        self.reads = 0
+
+    def started(self, event):
+        with self._lock:
+            if event.command_name in WRITE_COMMANDS:
+                self.writes += 1
+            elif event.command_name in READ_COMMANDS:
+                self.reads += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+counter = CommandCounter()
+monitoring.register(counter)
+
+import django
+
+# Setup Django
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
+django.setup()
+
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+ENGINES = ('django.contrib.sessions.backends.db', 'college_voting.mongo_sessions')
+
+
+def sign_in(request):
+    request.session['_auth_user_id'] = 'load-test'
+    request.session['registration_data'] = {'email': 'load-test@sfscollege.in'}
+    return HttpResponse()
+
+
+def page_view(request):
+    return HttpResponse(request.session.get('_auth_user_id', ''))
+
+
+def run_client(requests):
+    factory = RequestFactory()
+    login = SessionMiddleware(sign_in)
+    page = SessionMiddleware(page_view)
+
+    response = login(factory.post('/login/'))
+    session_key = response.cookies[settings.SESSION_COOKIE_NAME].value
+    for _ in range(requests - 1):
+        request = factory.get('/dashboard/')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = session_key
+        response = page(request)
+        if settings.SESSION_COOKIE_NAME in response.cookies:
+            session_key = response.cookies[settings.SESSION_COOKIE_NAME].value
+    return session_key
+
+
+def run(engine, clients, requests, threads):
+    with override_settings(SESSION_ENGINE=engine, SESSION_SAVE_EVERY_REQUEST=True):
+        store = import_module(engine).SessionStore
+        run_client(2)  # warm up connections and indexes
+        counter.reset()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            keys = list(executor.map(lambda _: run_client(requests), range(clients)))
+        elapsed = time.perf_counter() - start
+        writes, reads = counter.writes, counter.reads
+        for key in keys:
+            store().delete(key)
+
+    total = clients * requests
+    print(f"{engine:<38} {writes / total:>8.2f} {reads / total:>8.2f} "
+          f"{total / elapsed:>10.0f}")
+    return writes / total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20, help='requests per client, sign-in included')
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients x {args.requests} requests, {args.threads} threads\n")
+    print(f"{'engine':<38} {'writes/req':>8} {'reads/req':>8} {'req/s':>10}")
+    before, after = (run(engine, args.clients, args.requests, args.threads) for engine in ENGINES)
+    if before:
+        print(f"\nSession writes per request: {before:.2f} -> {after:.2f} (-{100 * (1 - after / before):.0f}%)")
+
+
+if __name__ == '__main__':
+    main()
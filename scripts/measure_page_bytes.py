@@ -0,0 +1,97 @@
+"""
+Measure the bytes MongoDB returns for the document loads of the admin
+dashboard, student list and results pages, comparing full-document loads
+with the projected (only()) loads and dashboard aggregations the views now
+use.
+
+Every reply to a find/getMore/aggregate command is captured with a pymongo
+command listener and its BSON size summed per page.
+
+Usage:
+    python scripts/measure_page_bytes.py [election_id]
+"""
+import os
+import sys
+from pathlib import Path
+
+from bson import encode
+from pymongo import monitoring
+
+READ_COMMANDS = {'find', 'getMore', 'aggregate'}
+
+
+# Register before Django opens its MongoClient so the listener is attached
+class ReplySizeListener(monitoring.CommandListener):
+    def __init__(self):
+        self.sizes = []
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if event.command_name in READ_COMMANDS:
+            self.sizes.append(len(encode(event.reply)))
+
+    def failed(self, event):
+        pass
+
+
+listener = ReplySizeListener()
+monitoring.register(listener)
+
+import django
+
+# Setup Django
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
+django.setup()
+
+from accounts.models import User
+from voting.admin_views import RESULT_CANDIDATE_FIELDS, STUDENT_LIST_FIELDS
+from voting.dashboard_stats import compute_dashboard_stats
+from voting.models import Candidate, Election
+
+
+def measure(load):
+    listener.sizes.clear()
+    load()
+    return len(listener.sizes), sum(listener.sizes)
+
+
+def report(page, full, projected):
+    (full_cmds, full_bytes), (proj_cmds, proj_bytes) = measure(full), measure(projected)
+    saved = 100 * (1 - proj_bytes / full_bytes) if full_bytes else 0
+    print(f"{page:<18} full: {full_bytes:>10,} bytes ({full_cmds} replies)   "
+          f"projected: {proj_bytes:>10,} bytes ({proj_cmds} replies)   -{saved:.0f}%")
+
+
+def main():
+    election_id = sys.argv[1] if len(sys.argv) > 1 else None
+    if election_id is None:
+        election = Election.objects.order_by('-created_at').first()
+        election_id = str(election._id) if election else None
+
+    report(
+        'admin_dashboard',
+        lambda: (list(Election.objects.all()), list(User.objects.all()),
+                 list(Election.objects.order_by('-created_at')[:5])),
+        compute_dashboard_stats,
+    )
+    report(
+        'manage_students',
+        lambda: list(User.objects.all()),
+        lambda: list(User.objects.only(*STUDENT_LIST_FIELDS)),
+    )
+    if election_id:
+        report(
+            'view_results',
+            lambda: list(Candidate.objects.filter(election_id=election_id)),
+            lambda: list(Candidate.objects.filter(election_id=election_id).only(*RESULT_CANDIDATE_FIELDS)),
+        )
+    else:
+        print("No elections found; skipping view_results.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure the bytes sent to MongoDB for a User location update, comparing a
+full-document save with the dirty-field save used by accounts.models.User.
+
+Every update command sent by the driver is captured with a pymongo command
+listener and its BSON size reported. The user's own location values are
+written back, so the only visible change is ``last_location_update``.
+
+Usage:
+    python scripts/measure_user_save_bytes.py [email]
+"""
+import os
+import sys
+from pathlib import Path
+
+from bson import encode
+from pymongo import monitoring
+
+
+# Register before Django opens its MongoClient so the listener is attached
+class UpdateSizeListener(monitoring.CommandListener):
+    def __init__(self):
+        self.sizes = []
+
+    def started(self, event):
+        if event.command_name == 'update':
+            self.sizes.append(len(encode(event.command)))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+listener = UpdateSizeListener()
+monitoring.register(listener)
+
+import django
+
+# Setup Django
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'college_voting.settings')
+django.setup()
+
+from django.utils import timezone
+
+from accounts.models import User
+from college_voting.mongo import get_collection
+
+
+def measure(label, save):
+    listener.sizes.clear()
+    save()
+    total = sum(listener.sizes)
+    print(f"{label:<28} {len(listener.sizes)} update command(s), {total:>9,} bytes")
+    return total
+
+
+def main():
+    if len(sys.argv) > 1:
+        user = User.objects.get(email=sys.argv[1])
+    else:
+        user = User.objects.first()
+    if user is None:
+        print("No users found.")
+        return
+
+    document_size = len(encode(get_collection(User).find_one({'_id': user.pk})))
+    print(f"User {user.email} (stored document: {document_size:,} bytes)\n")
+
+    # Before: what a plain save() did, i.e. an UPDATE of every column
+    all_fields = [f.attname for f in User._meta.concrete_fields if not f.primary_key]
+    user.last_location_update = timezone.now()
+    before = measure('full-document save', lambda: user.save(update_fields=all_fields))
+
+    # After: the same location update through the dirty-field path
+    user.last_location_update = timezone.now()
+    after = measure('dirty-field save', user.save)
+
+    if before:
+        print(f"\nReduction: {before - after:,} bytes per save ({(1 - after / before) * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
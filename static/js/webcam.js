@@ -103,23 +103,39 @@ function captureImage() {
     // Draw video frame to canvas
     context.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-    // Get image data as base64
-    capturedImage = canvas.toDataURL('image/jpeg', 0.8);
-    console.log("Image captured, length:", capturedImage.length);
-
-    // Set hidden input value
-    if (voterImageInput) {
-        voterImageInput.value = capturedImage;
-        console.log("Input field updated");
+    // Vote page: stream the raw JPEG to the server instead of a base64 field
+    const uploadForm = document.querySelector('form[data-image-upload-url]');
+    const tokenInput = document.getElementById('voter-image-token-input');
+
+    if (uploadForm && tokenInput && canvas.toBlob) {
+        canvas.toBlob(function (blob) {
+            capturedImage = blob;
+            console.log("Image captured, bytes:", blob.size);
+            if (previewImg) {
+                previewImg.src = URL.createObjectURL(blob);
+                previewImg.style.display = 'block'; // Ensure visible
+            }
+            uploadImageBlob(blob, uploadForm, tokenInput, canvas);
+        }, 'image/jpeg', 0.8);
     } else {
-        console.error("FATAL: voter-image-input hidden field not found!");
-        alert("Error: Could not save image. Please refresh and try again.");
-    }
+        // Get image data as base64
+        capturedImage = canvas.toDataURL('image/jpeg', 0.8);
+        console.log("Image captured, length:", capturedImage.length);
+
+        // Set hidden input value
+        if (voterImageInput) {
+            voterImageInput.value = capturedImage;
+            console.log("Input field updated");
+        } else {
+            console.error("FATAL: voter-image-input hidden field not found!");
+            alert("Error: Could not save image. Please refresh and try again.");
+        }
 
-    // Show preview
-    if (previewImg) {
-        previewImg.src = capturedImage;
-        previewImg.style.display = 'block'; // Ensure visible
+        // Show preview
+        if (previewImg) {
+            previewImg.src = capturedImage;
+            previewImg.style.display = 'block'; // Ensure visible
+        }
     }
     if (previewContainer) {
         previewContainer.style.display = 'block';
@@ -140,6 +156,40 @@ function captureImage() {
     updateSubmitButton();
 }
 
+// Upload captured image bytes and store the returned token in the form
+async function uploadImageBlob(blob, form, tokenInput, canvas) {
+    const csrfInput = form.querySelector('input[name="csrfmiddlewaretoken"]');
+    tokenInput.value = '';
+    updateSubmitButton();
+
+    try {
+        const response = await fetch(form.dataset.imageUploadUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': blob.type || 'image/jpeg',
+                'X-CSRFToken': csrfInput ? csrfInput.value : ''
+            },
+            credentials: 'same-origin',
+            body: blob
+        });
+        const data = await response.json();
+        if (!response.ok || !data.success) {
+            throw new Error(data.error || ('Upload failed with status ' + response.status));
+        }
+        tokenInput.value = data.token;
+        console.log("Image uploaded, token stored");
+    } catch (error) {
+        // Fall back to sending the image inline with the vote
+        console.error('Image upload failed, falling back to form field:', error);
+        const voterImageInput = document.getElementById('voter-image-input');
+        if (voterImageInput) {
+            voterImageInput.value = canvas.toDataURL('image/jpeg', 0.8);
+        }
+    }
+
+    updateSubmitButton();
+}
+
 // Retake image
 function retakeImage() {
     console.log("Retaking image...");
@@ -153,6 +203,10 @@ function retakeImage() {
     if (voterImageInput) {
         voterImageInput.value = '';
     }
+    const tokenInput = document.getElementById('voter-image-token-input');
+    if (tokenInput) {
+        tokenInput.value = '';
+    }
 
     if (previewContainer) {
         previewContainer.style.display = 'none';
@@ -171,7 +225,8 @@ function updateSubmitButton() {
     const submitBtn = document.getElementById('submit-vote-btn') || document.getElementById('submit-btn');
     if (!submitBtn) return;
 
-    const hasImage = document.getElementById('voter-image-input')?.value;
+    const hasImage = document.getElementById('voter-image-input')?.value ||
+        document.getElementById('voter-image-token-input')?.value;
     // Check if we are on vote page (requires candidate) or registration (requires password)
     const candidateInput = document.getElementById('candidate-id-input');
 
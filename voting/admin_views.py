@@ -1,13 +1,28 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.http import parse_etags
 from functools import wraps
 from django.contrib.auth.decorators import login_required
+from django.conf import settings
 from django.contrib import messages
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from django.db.models import Count
 from .models import Election, Candidate, Vote
+from .election_resolver import resolve_election, invalidate_election
+from .image_pipeline import failed_image_count, requeue_vote_images
+from .audit import audit_page
+from .dashboard_stats import get_dashboard_stats, invalidate_dashboard_stats
+from .election_catalog import invalidate_catalog
+from .repository import election_candidates
+from .tallies import get_tally, get_vote_totals, delete_tally, remove_votes
 from accounts.models import User
+from college_voting.cache import CANDIDATES, ELECTIONS, bump
+from college_voting.djongo_cache import parse_cache_stats
+from college_voting.mongo_pool import pool_metrics
+from accounts.photos import delete_photo
+from accounts.search import student_count, student_page
 from bson import ObjectId
 from bson.errors import InvalidId
 import json
@@ -22,6 +37,15 @@ def clean_id(id_str):
     return s
 
 
+# Fields the list pages actually render. djongo turns only() into a find()
+# projection, so the other fields never leave the database.
+STUDENT_LIST_FIELDS = (
+    'email', 'full_name', 'student_id', 'is_admin', 'date_joined', 'city', 'country',
+    'latitude', 'longitude', 'profile_photo', 'profile_thumb',
+)
+RESULT_CANDIDATE_FIELDS = ('name', 'image')
+
+
 def admin_required(view_func):
     """Decorator to ensure user is admin"""
     @wraps(view_func)
@@ -37,38 +61,17 @@ def admin_required(view_func):
 
 @admin_required
 def admin_dashboard(request):
-    # Get statistics
-    # Get statistics using Python-side filtering to avoid Djongo boolean filter bugs
-    total_elections = Election.objects.count()
-    
-    # Filter active elections in Python
-    all_elections = Election.objects.all()
-    active_elections = sum(1 for e in all_elections if e.is_ongoing())
-    
-    # Filter students in Python
-    all_users = User.objects.all()
-    total_students = sum(1 for u in all_users if not u.is_admin)
-
-    total_votes = Vote.objects.count()
-    
-    # Get recent elections
-    recent_elections = Election.objects.all().order_by('-created_at')[:5]
-    
-    # Prepare data for Chart.js
-    chart_labels = [e.title for e in recent_elections]
-    chart_data = []
-    for e in recent_elections:
-        count = Vote.objects.filter(election_id=str(e._id)).count()
-        chart_data.append(count)
+    # Counters and recent elections come from a few aggregations, cached briefly
+    stats = get_dashboard_stats()
     
     context = {
-        'total_elections': total_elections,
-        'active_elections': active_elections,
-        'total_students': total_students,
-        'total_votes': total_votes,
-        'recent_elections': recent_elections,
-        'chart_labels': json.dumps(chart_labels),
-        'chart_data': json.dumps(chart_data)
+        'total_elections': stats['total_elections'],
+        'active_elections': stats['active_elections'],
+        'total_students': stats['total_students'],
+        'total_votes': stats['total_votes'],
+        'recent_elections': stats['recent_elections'],
+        'chart_labels': json.dumps(stats['chart_labels']),
+        'chart_data': json.dumps(stats['chart_data'])
     }
     return render(request, 'admin/dashboard.html', context)
 
@@ -77,12 +80,13 @@ def admin_dashboard(request):
 def manage_elections(request):
     try:
         elections = list(Election.objects.all().order_by('-created_at'))
-        # Add vote count to each election object (robust counting)
+        # Add vote count to each election object, fetched for all in one go
+        try:
+            vote_totals = get_vote_totals(e._id for e in elections)
+        except Exception:
+            vote_totals = {}
         for e in elections:
-            try:
-                e.vote_count = Vote.objects.filter(election_id=str(e._id)).count()
-            except:
-                e.vote_count = 0
+            e.vote_count = vote_totals.get(str(e._id), 0)
     except Exception as e:
         messages.error(request, f"Error loading elections: {str(e)}")
         elections = []
@@ -118,6 +122,10 @@ def create_election(request):
             is_active=True
         )
         election.save()
+        invalidate_election(election._id)
+        invalidate_dashboard_stats()
+        invalidate_catalog()
+        bump(ELECTIONS)
         
         messages.success(request, f'Election "{title}" created successfully!')
         return redirect('manage_candidates', election_id=election._id)
@@ -127,31 +135,7 @@ def create_election(request):
 
 @admin_required
 def edit_election(request, election_id):
-    # --- SAFE ELECTION FETCHING ---
-    from bson import ObjectId
-    clean_eid = str(election_id).strip()
-    election = None
-    
-    # Method 1: Direct PK
-    try:
-        election = Election.objects.filter(pk=clean_eid).first()
-    except: pass
-
-    # Method 2: ObjectId lookup
-    if not election and len(clean_eid) == 24:
-        try:
-            election = Election.objects.filter(_id=ObjectId(clean_eid)).first()
-        except: pass
-
-    # Method 3: List find
-    if not election:
-        try:
-            for e in Election.objects.all():
-                if str(getattr(e, '_id', e.pk)) == clean_eid:
-                    election = e
-                    break
-        except: pass
-
+    election = resolve_election(election_id)
     if not election:
         messages.error(request, f"Election not found (ID: {election_id})")
         return redirect('manage_elections')
@@ -171,6 +155,10 @@ def edit_election(request, election_id):
         election.end_date = aware_end
         election.is_active = request.POST.get('is_active') == 'on'
         election.save()
+        invalidate_election(election._id)
+        invalidate_dashboard_stats()
+        invalidate_catalog()
+        bump(ELECTIONS)
         
         messages.success(request, 'Election updated successfully!')
         return redirect('manage_elections')
@@ -184,31 +172,7 @@ def delete_election(request, election_id):
     if request.method != 'POST':
         return redirect('manage_elections')
 
-    # --- SAFE ELECTION FETCHING ---
-    from bson import ObjectId
-    clean_eid = str(election_id).strip()
-    election = None
-    
-    # Method 1: Direct PK
-    try:
-        election = Election.objects.filter(pk=clean_eid).first()
-    except: pass
-
-    # Method 2: ObjectId lookup
-    if not election and len(clean_eid) == 24:
-        try:
-            election = Election.objects.filter(_id=ObjectId(clean_eid)).first()
-        except: pass
-
-    # Method 3: List find
-    if not election:
-        try:
-            for e in Election.objects.all():
-                if str(getattr(e, '_id', e.pk)) == clean_eid:
-                    election = e
-                    break
-        except: pass
-
+    election = resolve_election(election_id)
     if not election:
         messages.error(request, f"Election not found (ID: {election_id})")
         return redirect('manage_elections')
@@ -216,8 +180,13 @@ def delete_election(request, election_id):
     # Delete associated candidates and votes
     Candidate.objects.filter(election_id=str(election._id)).delete()
     Vote.objects.filter(election_id=str(election._id)).delete()
+    delete_tally(election._id)
     
     election.delete()
+    invalidate_election(election_id)
+    invalidate_dashboard_stats()
+    invalidate_catalog()
+    bump(ELECTIONS, CANDIDATES)
     messages.success(request, 'Election deleted successfully!')
     return redirect('manage_elections')
 
@@ -226,36 +195,7 @@ def delete_election(request, election_id):
 def manage_candidates(request, election_id):
     try:
         # --- 1. SAFE ELECTION FETCHING ---
-        from bson import ObjectId
-        clean_eid = str(election_id).strip()
-        election = None
-        
-        # Method 1: Direct PK
-        try:
-            election = Election.objects.filter(pk=clean_eid).first()
-        except: pass
-
-        # Method 2: ObjectId lookup (Most reliable for Djongo)
-        if not election and len(clean_eid) == 24:
-            try:
-                election = Election.objects.filter(_id=ObjectId(clean_eid)).first()
-            except: pass
-
-        # Method 3: Direct ID string
-        if not election:
-            try:
-                election = Election.objects.filter(id=clean_eid).first()
-            except: pass
-
-        # Method 4: List all and find (Backstop for weird query behavior)
-        if not election:
-            try:
-                for e in Election.objects.all():
-                    if str(getattr(e, '_id', e.pk)) == clean_eid:
-                        election = e
-                        break
-            except: pass
-
+        election = resolve_election(election_id)
         if not election:
             messages.error(request, f"Election not found (ID: {election_id})")
             return redirect('manage_elections')
@@ -282,6 +222,7 @@ def manage_candidates(request, election_id):
                         image=image
                     )
                     candidate.save() 
+                    bump(CANDIDATES)
 
                     if not messages.get_messages(request):
                         messages.success(request, "Candidate added successfully!")
@@ -337,6 +278,7 @@ def delete_candidate(request, candidate_id):
         candidate = get_object_or_404(Candidate, pk=clean_cid)
         election_id = str(candidate.election_id)
         candidate.delete()
+        bump(CANDIDATES)
         messages.success(request, 'Candidate deleted successfully!')
         return redirect('manage_candidates', election_id=election_id)
     except Exception as e:
@@ -348,47 +290,23 @@ def delete_candidate(request, candidate_id):
 def view_results(request, election_id):
     try:
         # --- SAFE ELECTION FETCHING ---
-        from bson import ObjectId
-        clean_eid = str(election_id).strip()
-        election = None
-        
-        # Method 1: Direct PK
-        try:
-            election = Election.objects.filter(pk=clean_eid).first()
-        except: pass
-
-        # Method 2: ObjectId lookup
-        if not election and len(clean_eid) == 24:
-            try:
-                election = Election.objects.filter(_id=ObjectId(clean_eid)).first()
-            except: pass
-
-        # Method 3: List find
-        if not election:
-            try:
-                for e in Election.objects.all():
-                    if str(getattr(e, '_id', e.pk)) == clean_eid:
-                        election = e
-                        break
-            except: pass
-
+        election = resolve_election(election_id)
         if not election:
             messages.error(request, f"Election not found (ID: {election_id})")
             return redirect('manage_elections')
         
         # Get all candidates for this election
-        candidates = list(Candidate.objects.filter(election_id=str(election._id)))
+        candidates = election_candidates(election._id, fields=RESULT_CANDIDATE_FIELDS)
         candidates_dict = {str(c._id): c for c in candidates}
         
-        # Get all votes for this election (convert to list to avoid repeated queries)
-        votes = list(Vote.objects.filter(election_id=str(election._id)).order_by('-voted_at'))
-        total_votes = len(votes)
+        # Per-candidate counts come from the materialized tally
+        tally = get_tally(election._id)
+        total_votes = tally['total']
         
         # Calculate results per candidate
         results = []
         for candidate in candidates:
-            # Filter votes in Python for reliability and speed
-            vote_count = sum(1 for v in votes if v.candidate_id == str(candidate._id))
+            vote_count = tally['counts'].get(str(candidate._id), 0)
             
             percentage = 0
             if total_votes > 0:
@@ -407,40 +325,15 @@ def view_results(request, election_id):
         chart_labels = [r['candidate'].name for r in results]
         chart_data = [r['votes'] for r in results]
         
-        # Fetch user profiles for the voter log
-        voter_emails = list(set(v.voter_email for v in votes if v.voter_email))
-        users = User.objects.filter(email__in=voter_emails)
-        users_dict = {}
-        for u in users:
-            if u.email:
-                users_dict[u.email.lower()] = u
-                
-        # Enrich vote objects for the audit log
-        for vote in votes:
-            # Match user profile
-            v_email = (vote.voter_email or '').lower()
-            profile = users_dict.get(v_email)
-            
-            if profile:
-                vote.user_profile = profile
-            else:
-                # Robust fallback for missing profiles
-                class MockProfile:
-                    full_name = 'Unknown Voter'
-                    student_id = 'N/A'
-                    profile_image = None
-                    profile_image_base64 = None
-                vote.user_profile = MockProfile()
-                
-            # Match candidate name
-            c = candidates_dict.get(vote.candidate_id)
-            vote.candidate_name = c.name if c else "Unknown"
+        # First page of the voter audit log; the page loads the rest on scroll
+        audit = audit_page(election._id, candidate_names={cid: c.name for cid, c in candidates_dict.items()})
         
         context = {
             'election': election,
             'results': results,
             'total_votes': total_votes,
-            'votes': votes,
+            'failed_images': failed_image_count(election._id),
+            'audit': audit,
             'chart_labels_json': json.dumps(chart_labels),
             'chart_data_json': json.dumps(chart_data)
         }
@@ -451,32 +344,91 @@ def view_results(request, election_id):
         return redirect('admin_dashboard')
 
 
+@admin_required
+def audit_log(request, election_id):
+    """One page of the voter audit log as rendered table rows (JSON)"""
+    election = resolve_election(election_id)
+    if not election:
+        return JsonResponse({'success': False, 'error': 'Election not found'}, status=404)
+
+    audit = audit_page(election._id, cursor=request.GET.get('cursor'))
+    return JsonResponse({
+        'success': True,
+        'html': render_to_string('admin/audit_rows.html', {'rows': audit['rows']}, request=request),
+        'next_cursor': audit['next_cursor']
+    })
+
+
+@admin_required
+def results_json(request, election_id):
+    """Live tallies for the results page, with a version-based ETag"""
+    election = resolve_election(election_id)
+    if not election:
+        return JsonResponse({'success': False, 'error': 'Election not found'}, status=404)
+
+    tally = get_tally(election._id)
+    etag = f'"{election._id}-{tally["version"]}"'
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        total_votes = tally['total']
+        response = JsonResponse({
+            'success': True,
+            'election_id': str(election._id),
+            'version': tally['version'],
+            'total_votes': total_votes,
+            'results': {
+                candidate_id: {
+                    'votes': count,
+                    'percentage': round((count / total_votes) * 100, 2) if total_votes else 0
+                }
+                for candidate_id, count in tally['counts'].items()
+            }
+        })
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@admin_required
+def connection_metrics(request):
+    """MongoDB pool and query translation metrics of this worker process (JSON)"""
+    return JsonResponse({
+        'success': True,
+        'profile': settings.MONGO_PROFILE,
+        'pool_options': settings.MONGO_POOL_OPTIONS,
+        'pool': pool_metrics.snapshot(),
+        'djongo_parse_cache': parse_cache_stats(),
+    })
+
+
+@admin_required
+def retry_vote_images(request, election_id):
+    """Queue failed (and abandoned) voter images of an election for processing again"""
+    if request.method == 'POST':
+        election = resolve_election(election_id)
+        if not election:
+            messages.error(request, f"Election not found (ID: {election_id})")
+            return redirect('manage_elections')
+        count = requeue_vote_images(election._id)
+        messages.success(request, f'{count} voter image(s) queued for processing.')
+    return redirect('view_results', election_id=election_id)
+
+
 @admin_required
 def manage_students(request):
-    """View to list and search students"""
+    """View to list and search students, one page at a time"""
     query = request.GET.get('q', '')
+    cursor = request.GET.get('after')
     
-    # Get all users first (Djongo compatible)
-    all_users = list(User.objects.all())
-    
-    # Filter non-admin users in Python
-    students = [user for user in all_users if not user.is_admin]
-    
-    if query:
-        # Search by name, email, or student_id
-        query_lower = query.lower()
-        students = [
-            s for s in students 
-            if query_lower in s.full_name.lower() 
-            or query_lower in s.email.lower() 
-            or query_lower in s.student_id.lower()
-        ]
-    else:
-        # Sort by date_joined (newest first)
-        students = sorted(students, key=lambda x: x.date_joined, reverse=True)
+    # Prefix search on the indexed search keys, newest students first
+    page = student_page(User, STUDENT_LIST_FIELDS, query=query, cursor=cursor)
         
     context = {
-        'students': students,
+        'students': page['students'],
+        'next_cursor': page['next_cursor'],
+        'total_students': student_count(User),
+        'is_first_page': not cursor,
         'query': query
     }
     return render(request, 'admin/manage_students.html', context)
@@ -495,12 +447,16 @@ def delete_student(request, user_id):
                 messages.error(request, 'Cannot delete admin accounts from here.')
                 return redirect('manage_students')
                 
-            # Delete associated votes
+            # Delete associated votes and recount the elections they were in
+            ballots = list(Vote.objects.filter(voter_email=student.email).values_list('election_id', 'candidate_id'))
             Vote.objects.filter(voter_email=student.email).delete()
+            if ballots:
+                remove_votes(ballots)
             
             # Delete student
             name = student.full_name
             student.delete()
+            delete_photo(student.profile_photo)
             
             messages.success(request, f'Student "{name}" and their votes have been deleted.')
         except User.DoesNotExist:
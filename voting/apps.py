@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class VotingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'voting'
+
+    def ready(self):
+        from college_voting.mongo_pool import install_pool_metrics
+        # Pool events are only delivered to clients created after this
+        if settings.DATABASES['default']['ENGINE'] == 'djongo':
+            install_pool_metrics()
+        from .vote_service import check_indexes_on_connect
+        # Verify the unique vote index as soon as the first DB connection opens
+        connection_created.connect(check_indexes_on_connect, dispatch_uid='voting_vote_indexes')
+        # Reuse djongo's SQL parse trees across executions of the same query
+        if getattr(settings, 'DJONGO_PARSE_CACHE', True) and settings.DATABASES['default']['ENGINE'] == 'djongo':
+            from college_voting.djongo_cache import install
+            install(max_size=getattr(settings, 'DJONGO_PARSE_CACHE_SIZE', 512))
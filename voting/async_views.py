@@ -0,0 +1,249 @@
+"""
+Async versions of the student voting views.
+
+Selected in voting/urls.py when ``VOTING_ASYNC_VIEWS`` is on, for ASGI
+deployments (college_voting/asgi.py). Every database round trip goes
+through the async driver (college_voting/mongo_async.py) and voter images
+are written with aiofiles, so a request waiting on MongoDB or the disk
+holds no thread and one process can keep thousands of voters in flight.
+
+Django 3.2 can't load ``request.user`` or the session from async code, so
+``async_login_required`` loads both itself: the session through
+``SessionStore.aload()`` when the Mongo session engine is in use, and the
+user document through the async driver. Responses are the same as those of
+the sync views in voting/views.py.
+"""
+import asyncio
+import base64
+import logging
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from bson import ObjectId
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.views import redirect_to_login
+from django.shortcuts import redirect, render
+from django.utils.crypto import constant_time_compare
+
+from accounts.location_buffer import location_buffer
+from accounts.models import User
+from college_voting.cache import CANDIDATES, ELECTIONS, namespace_timeout, namespace_version
+from college_voting.mongo import document_to_instance
+from college_voting.mongo_async import get_async_collection
+from college_voting.mongo_sessions import SessionStore as MongoSessionStore
+from .election_catalog import ACTIVE, catalog
+from .election_resolver import aresolve_election
+from .models import Vote
+from .repository import aelection_candidates, async_repository
+from .uploads import UploadError, adelete_file, aread_upload_token, arelease_staged_image, asave_file
+from .views import get_client_ip
+from .vote_service import acast_vote
+
+logger = logging.getLogger(__name__)
+
+
+async def aget_user(request):
+    """Authenticated user for the request, loaded without blocking"""
+    session = request.session
+    if not isinstance(session, MongoSessionStore):
+        return await sync_to_async(get_user)(request)
+
+    await session.aload()
+    user_id = session.get(SESSION_KEY)
+    if session.get(BACKEND_SESSION_KEY) not in settings.AUTHENTICATION_BACKENDS or not ObjectId.is_valid(user_id):
+        return AnonymousUser()
+    doc = await get_async_collection(User).find_one({'_id': ObjectId(user_id)})
+    if doc is None:
+        return AnonymousUser()
+    user = document_to_instance(User, doc)
+    # Same checks as django.contrib.auth.get_user()
+    if not user.is_active or not constant_time_compare(session.get(HASH_SESSION_KEY, ''), user.get_session_auth_hash()):
+        return AnonymousUser()
+    return user
+
+
+def async_login_required(view_func):
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        # Replace AuthenticationMiddleware's lazy user, which would load synchronously
+        request.user = request._cached_user = user
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+    return wrapper
+
+
+@async_login_required
+async def student_dashboard(request):
+    if request.user.is_admin:
+        return redirect('admin_dashboard')
+
+    entries, voted_elections = await asyncio.gather(
+        catalog.aentries(),
+        async_repository.voted_election_ids(request.user.email),
+    )
+
+    elections_data = []
+    for entry in entries:
+        has_voted = entry['election_id'] in voted_elections
+        elections_data.append({
+            'election': entry['election'],
+            'election_id': entry['election_id'],
+            'has_voted': has_voted,
+            'status': entry['status'],
+            'can_vote': entry['status'] == ACTIVE and not has_voted
+        })
+
+    context = {
+        'user': request.user,
+        'elections': elections_data,
+        'elections_version': namespace_version(ELECTIONS),
+        'fragment_timeout': namespace_timeout(),
+    }
+    return render(request, 'student/dashboard.html', context)
+
+
+@async_login_required
+async def vote_page(request, election_id):
+    if request.user.is_admin:
+        return redirect('admin_dashboard')
+
+    election = await aresolve_election(election_id)
+    if not election:
+        messages.error(request, 'Election not found.')
+        return redirect('student_dashboard')
+
+    if not election.is_ongoing():
+        messages.error(request, 'This election is not currently active.')
+        return redirect('student_dashboard')
+
+    has_voted, candidates = await asyncio.gather(
+        async_repository.has_voted(election._id, request.user.email),
+        aelection_candidates(election._id),
+    )
+    if has_voted:
+        messages.warning(request, 'You have already voted in this election.')
+        return redirect('student_dashboard')
+
+    context = {
+        'election': election,
+        'candidates': candidates,
+        'elections_version': namespace_version(ELECTIONS),
+        'candidates_version': namespace_version(CANDIDATES),
+        'fragment_timeout': namespace_timeout(),
+    }
+    return render(request, 'student/vote.html', context)
+
+
+@async_login_required
+async def submit_vote(request, election_id):
+    if request.method != 'POST':
+        return redirect('student_dashboard')
+
+    if request.user.is_admin:
+        return redirect('admin_dashboard')
+
+    election = await aresolve_election(election_id)
+    if not election:
+        messages.error(request, 'Election not found.')
+        return redirect('student_dashboard')
+
+    if not election.is_ongoing():
+        messages.error(request, 'This election is not currently active.')
+        return redirect('student_dashboard')
+
+    candidate_id = request.POST.get('candidate_id')
+    image_token = request.POST.get('voter_image_token')
+    image_data = request.POST.get('voter_image')  # Legacy base64 data URI
+    latitude = request.POST.get('latitude')
+    longitude = request.POST.get('longitude')
+    city = request.POST.get('city', '')
+    country = request.POST.get('country', '')
+
+    if not all([candidate_id, image_token or image_data, latitude, longitude]):
+        messages.error(request, 'Missing required data. Please ensure camera and location permissions are granted.')
+        return redirect('vote_page', election_id=election_id)
+
+    candidate = await async_repository.get_candidate(candidate_id, election_id=election._id)
+    if candidate is None:
+        messages.error(request, 'Invalid candidate selected.')
+        return redirect('vote_page', election_id=election_id)
+
+    # Prefer the streamed upload, fall back to the base64 field
+    written_image = None
+    if image_token:
+        try:
+            image_name = await aread_upload_token(image_token, request.user.email, str(election._id))
+        except UploadError as e:
+            messages.error(request, str(e))
+            return redirect('vote_page', election_id=election_id)
+    else:
+        try:
+            format, imgstr = image_data.split(';base64,')
+            ext = format.split('/')[-1]
+            data = base64.b64decode(imgstr)
+        except Exception:
+            messages.error(request, 'Error processing image.')
+            return redirect('vote_page', election_id=election_id)
+        name = Vote._meta.get_field('voter_image').generate_filename(None, f'{uuid.uuid4().hex}.{ext}')
+        image_name = written_image = await asave_file(name, data)
+
+    vote = Vote(
+        election_id=str(election._id),
+        candidate_id=str(candidate._id),
+        voter_email=request.user.email,
+        voter_image=image_name,
+        latitude=float(latitude),
+        longitude=float(longitude),
+        city=city,
+        country=country,
+        ip_address=get_client_ip(request),
+        image_status=Vote.IMAGE_PENDING
+    )
+    if not await acast_vote(vote):
+        if written_image:
+            await adelete_file(written_image)
+        else:
+            await arelease_staged_image(image_name, request.user.email, election._id)
+        messages.warning(request, 'You have already voted in this election.')
+        return redirect('student_dashboard')
+
+    try:
+        await sync_to_async(location_buffer.record, thread_sensitive=False)(
+            request.user, float(latitude), float(longitude), city, country
+        )
+    except Exception as e:
+        # Log error but don't fail the vote
+        logger.error("Error updating user location: %s", e)
+
+    messages.success(request, 'Your vote has been recorded successfully!')
+    return redirect('vote_confirmation', election_id=election_id)
+
+
+@async_login_required
+async def vote_confirmation(request, election_id):
+    if request.user.is_admin:
+        return redirect('admin_dashboard')
+
+    election = await aresolve_election(election_id)
+    if not election:
+        messages.error(request, 'Election not found.')
+        return redirect('student_dashboard')
+
+    vote = await async_repository.get_vote(election._id, request.user.email)
+    candidate = await async_repository.get_candidate(vote.candidate_id) if vote else None
+    if candidate is None:
+        messages.error(request, 'Vote not found.')
+        return redirect('student_dashboard')
+
+    context = {
+        'election': election,
+        'candidate': candidate,
+        'vote': vote
+    }
+    return render(request, 'student/confirmation.html', context)
@@ -0,0 +1,116 @@
+"""
+Keyset-paginated voter audit log for the results page.
+
+Votes are read newest first on the (election_id, voted_at, _id) index, one
+page at a time, together with only the voter profiles that page references.
+The cursor is the (voted_at, _id) of the last row returned, so fetching the
+next page never skips or repeats rows while new votes keep arriving.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.core.files.storage import default_storage
+from pymongo import DESCENDING
+
+from accounts.models import User
+from accounts.photos import photo_url
+from college_voting.mongo import get_collection
+from college_voting.thumbnails import thumbnail_url
+from .models import Candidate, Vote
+
+PAGE_SIZE = 50
+
+VOTE_FIELDS = {
+    'candidate_id': 1, 'voter_email': 1, 'voter_image': 1, 'voter_thumb': 1,
+    'latitude': 1, 'longitude': 1, 'city': 1, 'country': 1, 'voted_at': 1,
+}
+PROFILE_FIELDS = {
+    'email': 1, 'full_name': 1, 'student_id': 1, 'profile_image': 1, 'profile_thumb': 1, 'profile_photo': 1,
+}
+UNKNOWN_PROFILE = {
+    'full_name': 'Unknown Voter',
+    'student_id': 'N/A',
+    'profile_thumb_url': None,
+    'profile_image_url': None,
+    'profile_photo_url': None,
+}
+
+
+def encode_cursor(voted_at, vote_id):
+    return f'{voted_at.isoformat()}~{vote_id}'
+
+
+def decode_cursor(cursor):
+    """Return (voted_at, ObjectId) for a cursor string, or None if invalid"""
+    try:
+        voted_at, vote_id = cursor.split('~', 1)
+        return datetime.fromisoformat(voted_at), ObjectId(vote_id)
+    except (ValueError, InvalidId):
+        return None
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+def audit_page(election_id, cursor=None, limit=PAGE_SIZE, candidate_names=None):
+    """
+    Return {'rows': [...], 'next_cursor': str or None} for one page of the
+    audit log of an election, newest vote first.
+    """
+    election_id = str(election_id)
+    query = {'election_id': election_id}
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        voted_at, vote_id = position
+        query['$or'] = [
+            {'voted_at': {'$lt': voted_at}},
+            {'voted_at': voted_at, '_id': {'$lt': vote_id}},
+        ]
+
+    docs = list(
+        get_collection(Vote).find(query, VOTE_FIELDS)
+        .sort([('voted_at', DESCENDING), ('_id', DESCENDING)])
+        .limit(limit + 1)
+    )
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+
+    emails = list({doc['voter_email'] for doc in docs if doc.get('voter_email')})
+    profiles = {}
+    if emails:
+        for user in get_collection(User).find({'email': {'$in': emails}}, PROFILE_FIELDS):
+            profiles[user['email'].lower()] = {
+                'full_name': user.get('full_name'),
+                'student_id': user.get('student_id'),
+                'profile_thumb_url': thumbnail_url(user.get('profile_thumb')),
+                'profile_image_url': _media_url(user.get('profile_image')),
+                'profile_photo_url': photo_url(user.get('profile_photo')),
+            }
+
+    if candidate_names is None:
+        candidate_names = {
+            str(c._id): c.name for c in Candidate.objects.filter(election_id=election_id).only('name')
+        }
+
+    rows = []
+    for doc in docs:
+        voted_at = doc.get('voted_at')
+        rows.append({
+            'user_profile': profiles.get((doc.get('voter_email') or '').lower(), UNKNOWN_PROFILE),
+            'voter_image_url': _media_url(doc.get('voter_image')),
+            'voter_thumb_url': thumbnail_url(doc.get('voter_thumb')),
+            'candidate_name': candidate_names.get(doc.get('candidate_id'), 'Unknown'),
+            'latitude': doc.get('latitude'),
+            'longitude': doc.get('longitude'),
+            'city': doc.get('city'),
+            'country': doc.get('country'),
+            # pymongo returns naive UTC datetimes
+            'voted_at': voted_at.replace(tzinfo=dt_timezone.utc) if voted_at else None,
+        })
+
+    next_cursor = None
+    if has_more and docs:
+        next_cursor = encode_cursor(docs[-1]['voted_at'], docs[-1]['_id'])
+    return {'rows': rows, 'next_cursor': next_cursor}
@@ -0,0 +1,113 @@
+"""
+Admin dashboard statistics in a fixed number of round trips.
+
+One ``$facet`` aggregation over the elections collection returns the total,
+the number of ongoing elections and the five most recent elections joined
+with their tally totals; the student and vote counts are one count each. The
+assembled result is kept in process for ``DASHBOARD_STATS_TTL`` seconds, so
+dashboard refreshes during voting cost nothing until it expires.
+"""
+import threading
+import time
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from accounts.models import User
+from college_voting.mongo import get_collection
+from .models import Election, Vote
+from .tallies import TALLY_COLLECTION, get_vote_totals
+
+RECENT_ELECTIONS = 5
+RECENT_FIELDS = ('title', 'description', 'start_date', 'end_date', 'is_active', 'created_by', 'created_at')
+
+_cached = None
+_expires_at = 0
+_lock = threading.Lock()
+
+
+def _aware(value):
+    # pymongo returns naive UTC datetimes
+    return value.replace(tzinfo=dt_timezone.utc) if value and value.tzinfo is None else value
+
+
+def _election_facets(now):
+    pipeline = [{'$facet': {
+        'total': [{'$count': 'n'}],
+        'active': [
+            {'$match': {'is_active': True, 'start_date': {'$lte': now}, 'end_date': {'$gte': now}}},
+            {'$count': 'n'},
+        ],
+        'recent': [
+            {'$sort': {'created_at': -1}},
+            {'$limit': RECENT_ELECTIONS},
+            # Tallies are keyed by the election id as a string
+            {'$lookup': {
+                'from': TALLY_COLLECTION,
+                'let': {'eid': {'$toString': '$_id'}},
+                'pipeline': [
+                    {'$match': {'$expr': {'$eq': ['$_id', '$$eid']}}},
+                    {'$project': {'total': 1}},
+                ],
+                'as': 'tally',
+            }},
+            {'$project': dict({field: 1 for field in RECENT_FIELDS}, tally=1)},
+        ],
+    }}]
+    return next(get_collection(Election).aggregate(pipeline))
+
+
+def compute_dashboard_stats():
+    """Return the dashboard counters and recent elections, uncached"""
+    now = timezone.now()
+    facets = _election_facets(now)
+
+    recent_elections = []
+    chart_totals = {}
+    for doc in facets['recent']:
+        election = Election(_id=doc['_id'], **{
+            field: _aware(doc.get(field)) if field.endswith(('_date', '_at')) else doc.get(field)
+            for field in RECENT_FIELDS
+        })
+        recent_elections.append(election)
+        if doc['tally']:
+            chart_totals[str(doc['_id'])] = doc['tally'][0].get('total', 0)
+
+    # Elections predating the tallies collection are counted in one batch
+    untallied = [str(e._id) for e in recent_elections if str(e._id) not in chart_totals]
+    chart_totals.update(get_vote_totals(untallied))
+    chart_data = [chart_totals[str(e._id)] for e in recent_elections]
+
+    def count(facet):
+        return facets[facet][0]['n'] if facets[facet] else 0
+
+    return {
+        'total_elections': count('total'),
+        'active_elections': count('active'),
+        'total_students': get_collection(User).count_documents({'is_admin': {'$ne': True}}),
+        'total_votes': get_collection(Vote).count_documents({}),
+        'recent_elections': recent_elections,
+        'chart_labels': [e.title for e in recent_elections],
+        'chart_data': chart_data,
+    }
+
+
+def get_dashboard_stats():
+    """compute_dashboard_stats(), cached for DASHBOARD_STATS_TTL seconds"""
+    global _cached, _expires_at
+    ttl = getattr(settings, 'DASHBOARD_STATS_TTL', 5)
+    with _lock:
+        if _cached is not None and time.monotonic() < _expires_at:
+            return _cached
+    stats = compute_dashboard_stats()
+    with _lock:
+        _cached = stats
+        _expires_at = time.monotonic() + ttl
+    return stats
+
+
+def invalidate_dashboard_stats():
+    global _cached
+    with _lock:
+        _cached = None
@@ -0,0 +1,109 @@
+"""
+Process-wide catalog of the elections shown on the student dashboard.
+
+The list of active elections and their status is the same for every student,
+so it is loaded once and shared. Statuses are only recomputed when the next
+start or end date passes, and the elections themselves are reloaded after an
+admin creates, edits or deletes one. The admin views call
+``invalidate_catalog`` and bump the ``elections`` cache namespace; the
+catalog remembers the namespace version it was loaded at, so other processes
+reload as soon as they see the new version (see college_voting/cache.py), and
+after ``ELECTION_CATALOG_TTL`` seconds at the latest.
+Each request then only has to look up the student's own voted elections.
+Async views use ``aentries()``, which loads through the async driver.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from college_voting.cache import ELECTIONS, namespace_version
+from .repository import async_repository, get_repository
+
+UPCOMING = 'upcoming'
+ACTIVE = 'active'
+ENDED = 'ended'
+
+
+def election_status(election, now):
+    if election.start_date <= now <= election.end_date:
+        return ACTIVE
+    if now > election.end_date:
+        return ENDED
+    return UPCOMING
+
+
+class ElectionCatalog:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._elections = None
+        self._version = None
+        self._expires_at = 0
+        self._entries = []
+        self._next_boundary = None
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.recomputes = 0
+
+    def _stale(self, version):
+        return (self._elections is None or version != self._version
+                or time.monotonic() >= self._expires_at)
+
+    def _load(self, version, elections=None):
+        self._elections = get_repository().active_elections() if elections is None else elections
+        self._version = version
+        self._expires_at = time.monotonic() + self.ttl
+        self._next_boundary = None
+        self.loads += 1
+
+    def _recompute(self, now):
+        self._entries = [
+            {'election': e, 'election_id': str(e._id), 'status': election_status(e, now)}
+            for e in self._elections
+        ]
+        # Earliest future start or end date; statuses hold until then
+        boundaries = [d for e in self._elections for d in (e.start_date, e.end_date) if d > now]
+        self._next_boundary = min(boundaries) if boundaries else None
+        self.recomputes += 1
+
+    def _current(self, version, elections=None, load=True):
+        now = timezone.now()
+        with self._lock:
+            reloaded = elections is not None
+            if reloaded:
+                self._load(version, elections)
+            elif self._stale(version):
+                if not load:
+                    return None
+                self._load(version)
+                reloaded = True
+            if reloaded or (self._next_boundary is not None and now >= self._next_boundary):
+                self._recompute(now)
+            return self._entries
+
+    def entries(self):
+        """Return [{'election', 'election_id', 'status'}, ...], newest first"""
+        # Read before loading, so a bump during the load triggers another
+        return self._current(namespace_version(ELECTIONS))
+
+    async def aentries(self):
+        """entries() for async views"""
+        while True:
+            version = namespace_version(ELECTIONS)
+            elections = await async_repository.active_elections() if self._stale(version) else None
+            # None if invalidated meanwhile; never load synchronously here
+            entries = self._current(version, elections, load=False)
+            if entries is not None:
+                return entries
+
+    def invalidate(self):
+        with self._lock:
+            self._elections = None
+
+
+catalog = ElectionCatalog(ttl=getattr(settings, 'ELECTION_CATALOG_TTL', 300))
+
+
+def invalidate_catalog():
+    catalog.invalidate()
@@ -0,0 +1,196 @@
+"""
+Shared election lookup for every election-scoped view.
+
+Replaces the per-view "SAFE ELECTION FETCHING" chain with one resolver that
+keeps recently used ``Election`` objects in a small in-process LRU cache with
+a TTL. Ids that are not ObjectIds are rejected without a query or a cache
+entry; valid ids that do not resolve are cached negatively, so a bad or
+stale link costs at most one indexed lookup per TTL. Admin write views call
+``invalidate_election`` after changing an election and bump the
+``elections`` cache namespace; entries cached at an older namespace version
+are misses, so other processes drop them too (see college_voting/cache.py).
+``aresolve_election`` is the variant for async views.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+from django.conf import settings
+
+from college_voting.cache import ELECTIONS, namespace_version
+from college_voting.mongo import document_to_instance, get_collection
+from college_voting.mongo_async import get_async_collection
+
+from .models import Election
+
+# Sentinel stored for ids that did not resolve to an election
+_MISSING = object()
+
+
+class ElectionCache:
+    """Thread-safe LRU cache with per-entry expiry and version"""
+
+    def __init__(self, max_size=256, ttl=30, negative_ttl=10):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.invalidations = 0
+
+    def get(self, key, version=None):
+        """
+        Return the cached value, _MISSING for a negative entry, or None. An
+        entry stored under another ``version`` counts as expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at, entry_version = entry
+            if expires_at <= now or entry_version != version:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if value is _MISSING:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return value
+
+    def set(self, key, value, version=None):
+        ttl = self.negative_ttl if value is _MISSING else self.ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl, version)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache = ElectionCache(
+    max_size=getattr(settings, 'ELECTION_CACHE_SIZE', 256),
+    ttl=getattr(settings, 'ELECTION_CACHE_TTL', 30),
+    negative_ttl=getattr(settings, 'ELECTION_CACHE_NEGATIVE_TTL', 10),
+)
+
+
+def normalize_election_id(election_id):
+    """Strip whitespace and any ObjectId('...') wrapper from an id"""
+    if not election_id:
+        return ''
+    return str(election_id).replace("ObjectId('", "").replace("')", "").strip()
+
+
+def _is_election_id(clean_eid):
+    # Election ids are ObjectIds; anything else can't match an election
+    return len(clean_eid) == 24 and ObjectId.is_valid(clean_eid)
+
+
+def _fetch_election(clean_eid):
+    """Load an election from the database by its ObjectId"""
+    oid = ObjectId(clean_eid)
+
+    # Method 1: ObjectId lookup through the ORM (most reliable for Djongo)
+    try:
+        election = Election.objects.filter(_id=oid).first()
+        if election:
+            return election
+    except Exception:
+        pass
+
+    # Method 2: the same indexed lookup straight through pymongo, as a
+    # backstop for djongo translation quirks (no collection scan)
+    try:
+        doc = get_collection(Election).find_one({'_id': oid})
+    except Exception:
+        return None
+    return document_to_instance(Election, doc) if doc else None
+
+
+def resolve_election(election_id):
+    """
+    Return the Election for ``election_id`` or None if it does not exist.
+
+    The returned object is a private copy, so callers may modify and save it
+    without affecting the cached instance.
+    """
+    clean_eid = normalize_election_id(election_id)
+    if not _is_election_id(clean_eid):
+        return None
+
+    # Read before fetching, so a bump during the fetch is not missed
+    version = namespace_version(ELECTIONS)
+    cached = _cache.get(clean_eid, version)
+    if cached is _MISSING:
+        return None
+    if cached is None:
+        cached = _fetch_election(clean_eid)
+        _cache.set(clean_eid, cached if cached is not None else _MISSING, version)
+        if cached is None:
+            return None
+    return copy.copy(cached)
+
+
+async def aresolve_election(election_id):
+    """
+    resolve_election() for async views: a cache miss is read by ``_id``
+    through the async driver.
+    """
+    clean_eid = normalize_election_id(election_id)
+    if not _is_election_id(clean_eid):
+        return None
+
+    version = namespace_version(ELECTIONS)
+    cached = _cache.get(clean_eid, version)
+    if cached is _MISSING:
+        return None
+    if cached is None:
+        doc = await get_async_collection(Election).find_one({'_id': ObjectId(clean_eid)})
+        cached = document_to_instance(Election, doc) if doc is not None else None
+        _cache.set(clean_eid, cached if cached is not None else _MISSING, version)
+        if cached is None:
+            return None
+    return copy.copy(cached)
+
+
+def invalidate_election(election_id=None):
+    """Forget a cached election (or all of them) after an admin write"""
+    if election_id is None:
+        _cache.invalidate()
+    else:
+        _cache.invalidate(normalize_election_id(election_id))
+
+
+def election_cache_stats():
+    """Hit/miss counters for monitoring the resolver cache"""
+    return _cache.stats()
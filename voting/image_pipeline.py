@@ -0,0 +1,180 @@
+"""
+Background processing of voter images.
+
+A ballot is committed with ``image_status='pending'`` and a reference to the
+raw staged upload. A small worker pool then validates the image, applies the
+EXIF orientation and drops all other metadata, re-encodes it as a bounded
+JPEG under ``voter_images/``, renders its thumbnails and marks the vote
+``done``. Failures are retried with backoff; after ``VOTER_IMAGE_MAX_ATTEMPTS``
+the vote is marked ``failed`` and shows up on the admin results page, where it
+can be queued again.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from college_voting.mongo import get_collection
+from college_voting.thumbnails import make_thumbnails
+from .models import Vote
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_DIR = 'voter_images'
+MAX_DIMENSION = 1280
+JPEG_QUALITY = 85
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    with _executor_lock:
+        # Worker threads don't survive a fork, so build one pool per process
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'VOTER_IMAGE_WORKERS', 2),
+                thread_name_prefix='voter-image',
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def reencode_image(source_name):
+    """Validate, strip metadata from and re-encode a stored image; returns JPEG bytes"""
+    with default_storage.open(source_name, 'rb') as f:
+        image = Image.open(f)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.thumbnail((MAX_DIMENSION, MAX_DIMENSION))
+
+    # Saving without exif=/icc_profile= drops all source metadata
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def process_vote_image(vote_id):
+    """Process the pending image of one vote. Safe to call more than once."""
+    collection = get_collection(Vote)
+    oid = ObjectId(str(vote_id))
+    doc = collection.find_one(
+        {'_id': oid},
+        {'voter_image': 1, 'image_status': 1, 'image_attempts': 1},
+    )
+    if not doc or doc.get('image_status') != Vote.IMAGE_PENDING:
+        return
+
+    source_name = doc.get('voter_image')
+    try:
+        data = reencode_image(source_name)
+        stem = os.path.splitext(os.path.basename(source_name))[0]
+        final_name = default_storage.save(f'{OUTPUT_DIR}/{stem}.jpg', ContentFile(data))
+    except Exception as e:
+        _record_failure(collection, oid, doc.get('image_attempts') or 0, e)
+        return
+
+    try:
+        voter_thumb = make_thumbnails(data)
+    except Exception as e:
+        logger.warning("Thumbnail for vote %s failed: %s", oid, e)
+        voter_thumb = None
+
+    result = collection.update_one(
+        {'_id': oid, 'image_status': Vote.IMAGE_PENDING},
+        {'$set': {'voter_image': final_name, 'voter_thumb': voter_thumb,
+                  'image_status': Vote.IMAGE_DONE, 'image_error': ''},
+         '$inc': {'image_attempts': 1}},
+    )
+    if result.modified_count:
+        if source_name != final_name:
+            default_storage.delete(source_name)
+    else:
+        # Another worker finished first; keep its output
+        default_storage.delete(final_name)
+
+
+def _record_failure(collection, oid, attempts, error):
+    attempts += 1
+    max_attempts = getattr(settings, 'VOTER_IMAGE_MAX_ATTEMPTS', 3)
+    update = {'image_attempts': attempts, 'image_error': f'{type(error).__name__}: {error}'[:500]}
+    if attempts >= max_attempts:
+        update['image_status'] = Vote.IMAGE_FAILED
+        logger.error("Voter image for vote %s failed after %d attempts: %s", oid, attempts, error)
+    else:
+        logger.warning("Voter image for vote %s failed (attempt %d): %s", oid, attempts, error)
+    collection.update_one({'_id': oid, 'image_status': Vote.IMAGE_PENDING}, {'$set': update})
+
+    if attempts < max_attempts:
+        delay = getattr(settings, 'VOTER_IMAGE_RETRY_DELAY', 5) * (2 ** (attempts - 1))
+        timer = threading.Timer(delay, enqueue_vote_image, args=(oid,))
+        timer.daemon = True
+        timer.start()
+
+
+def _run(vote_id):
+    try:
+        process_vote_image(vote_id)
+    except Exception:
+        logger.exception("Unexpected error processing voter image for vote %s", vote_id)
+
+
+def enqueue_vote_image(vote_id):
+    """Schedule processing of a vote's pending image"""
+    if getattr(settings, 'VOTER_IMAGE_ASYNC', True):
+        _get_executor().submit(_run, vote_id)
+    else:
+        _run(vote_id)
+
+
+def reset_vote_images(election_id=None, include_failed=True, stale_after=timedelta(minutes=5)):
+    """
+    Mark failed images, and pending ones older than ``stale_after`` (e.g. left
+    behind by a restarted worker), as pending again. Returns their vote ids.
+    """
+    collection = get_collection(Vote)
+    conditions = [{
+        'image_status': Vote.IMAGE_PENDING,
+        'voted_at': {'$lt': timezone.now() - stale_after},
+    }]
+    if include_failed:
+        conditions.append({'image_status': Vote.IMAGE_FAILED})
+    query = {'$or': conditions}
+    if election_id:
+        query['election_id'] = str(election_id)
+
+    vote_ids = [doc['_id'] for doc in collection.find(query, {'_id': 1})]
+    if vote_ids:
+        collection.update_many(
+            {'_id': {'$in': vote_ids}},
+            {'$set': {'image_status': Vote.IMAGE_PENDING, 'image_attempts': 0, 'image_error': ''}},
+        )
+    return vote_ids
+
+
+def requeue_vote_images(election_id=None, include_failed=True):
+    """Reset stuck or failed images and queue them again; returns how many"""
+    vote_ids = reset_vote_images(election_id, include_failed)
+    for vote_id in vote_ids:
+        enqueue_vote_image(vote_id)
+    return len(vote_ids)
+
+
+def failed_image_count(election_id):
+    """Number of votes in an election whose image could not be processed"""
+    return get_collection(Vote).count_documents(
+        {'election_id': str(election_id), 'image_status': Vote.IMAGE_FAILED}
+    )
@@ -0,0 +1,183 @@
+"""
+Server-Sent Events stream of live election tallies.
+
+Served directly by the ASGI application in ``college_voting/asgi.py`` at
+``/admin/elections/<id>/results/stream/``. Each process runs at most one
+poller per watched election, which reads the tally document once per
+``RESULTS_STREAM_INTERVAL`` and fans any change out to every connected
+admin, so N open results pages cost one upstream read per tick.
+
+Events are ``tally`` messages carrying the new total, the version and the
+absolute counts of the candidates that changed since the previous event.
+The first event on a connection (or after a subscriber fell behind) carries
+every candidate and ``"full": true``.
+"""
+import asyncio
+import json
+import logging
+import re
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+
+from .election_resolver import resolve_election
+from .tallies import get_tally
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = re.compile(r'^/admin/elections/(?P<election_id>[^/]+)/results/stream/$')
+QUEUE_SIZE = 32
+
+
+class TallyBroadcaster:
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._subscribers = {}  # election id -> set of queues
+        self._pollers = {}      # election id -> asyncio.Task
+        self._latest = {}       # election id -> last tally read
+        self.reads = 0
+
+    def subscribe(self, election_id):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers.setdefault(election_id, set()).add(queue)
+        if election_id in self._latest:
+            queue.put_nowait(self._full_event(self._latest[election_id]))
+        if election_id not in self._pollers:
+            self._pollers[election_id] = asyncio.ensure_future(self._poll(election_id))
+        return queue
+
+    def unsubscribe(self, election_id, queue):
+        subscribers = self._subscribers.get(election_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[election_id]
+            self._latest.pop(election_id, None)
+            poller = self._pollers.pop(election_id, None)
+            if poller is not None:
+                poller.cancel()
+
+    @staticmethod
+    def _full_event(tally):
+        return {'full': True, 'version': tally['version'], 'total': tally['total'], 'counts': dict(tally['counts'])}
+
+    async def _poll(self, election_id):
+        read_tally = sync_to_async(get_tally, thread_sensitive=False)
+        while True:
+            try:
+                tally = await read_tally(election_id)
+                self.reads += 1
+            except Exception as e:
+                logger.error("Tally read for election %s failed: %s", election_id, e)
+                await asyncio.sleep(self.interval)
+                continue
+
+            previous = self._latest.get(election_id)
+            self._latest[election_id] = tally
+            if previous is None or previous['version'] != tally['version']:
+                if previous is None:
+                    event = self._full_event(tally)
+                else:
+                    changed = {
+                        candidate_id: count for candidate_id, count in tally['counts'].items()
+                        if previous['counts'].get(candidate_id) != count
+                    }
+                    event = {'full': False, 'version': tally['version'], 'total': tally['total'], 'counts': changed}
+                self._publish(election_id, event, tally)
+            await asyncio.sleep(self.interval)
+
+    def _publish(self, election_id, event, tally):
+        for queue in list(self._subscribers.get(election_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Subscriber fell behind: replace its backlog with a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self._full_event(tally))
+
+
+broadcaster = TallyBroadcaster(interval=getattr(settings, 'RESULTS_STREAM_INTERVAL', 1.0))
+
+
+class _SessionRequest:
+    """Just enough of a request for django.contrib.auth.get_user()"""
+
+    def __init__(self, session):
+        self.session = session
+
+
+def _load_admin(scope):
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+    morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    user = get_user(_SessionRequest(engine.SessionStore(morsel.value)))
+    if user.is_authenticated and user.is_admin:
+        return user
+    return None
+
+
+async def _send_status(send, status, message):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')]})
+    await send({'type': 'http.response.body', 'body': message.encode()})
+
+
+async def sse_application(scope, receive, send):
+    """ASGI app for the tally event stream"""
+    match = STREAM_PATH.match(scope['path'])
+    admin = await sync_to_async(_load_admin)(scope)
+    if admin is None:
+        await _send_status(send, 403, 'Admin privileges required.')
+        return
+    election = await sync_to_async(resolve_election)(match.group('election_id'))
+    if election is None:
+        await _send_status(send, 404, 'Election not found.')
+        return
+
+    election_id = str(election._id)
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    queue = broadcaster.subscribe(election_id)
+    disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, disconnect}, timeout=15,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                getter.cancel()
+                break
+            if getter in done:
+                payload = f'event: tally\ndata: {json.dumps(getter.result())}\n\n'
+            else:
+                getter.cancel()
+                payload = ': keep-alive\n\n'
+            await send({'type': 'http.response.body', 'body': payload.encode(), 'more_body': True})
+    finally:
+        broadcaster.unsubscribe(election_id, queue)
+        disconnect.cancel()
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from college_voting.mongo import get_collection
+from accounts.photos import load_photo
+from college_voting.thumbnails import make_thumbnails, thumbnails_from_data_uri, thumbnails_from_storage
+from voting.models import Vote
+
+
+class Command(BaseCommand):
+    help = 'Generate cached thumbnails for profile and voter photos that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-votes', action='store_true', help='Only process user profile photos')
+
+    def handle(self, *args, **options):
+        done, failed = self._backfill_users()
+        self.stdout.write(f'Profile photos: {done} thumbnailed, {failed} failed')
+        if not options['skip_votes']:
+            done, failed = self._backfill_votes()
+            self.stdout.write(f'Voter images: {done} thumbnailed, {failed} failed')
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    def _backfill_users(self):
+        users = get_collection(User)
+        query = {
+            'profile_thumb': {'$in': [None, '']},
+            '$or': [
+                {'profile_photo': {'$nin': [None, '']}},
+                {'profile_image_base64': {'$nin': [None, '']}},
+                {'profile_image': {'$nin': [None, '']}},
+            ],
+        }
+        done = failed = 0
+        # Only the ids are held by the cursor; each photo is loaded on its own
+        for doc in list(users.find(query, {'_id': 1})):
+            user = users.find_one(
+                {'_id': doc['_id']},
+                {'email': 1, 'profile_photo': 1, 'profile_image_base64': 1, 'profile_image': 1},
+            )
+            try:
+                photo = load_photo(user['profile_photo']) if user.get('profile_photo') else None
+                if photo is not None:
+                    ref = make_thumbnails(photo[0])
+                elif user.get('profile_image_base64'):
+                    # Not yet moved by migrate_profile_photos
+                    ref = thumbnails_from_data_uri(user['profile_image_base64'])
+                else:
+                    ref = thumbnails_from_storage(user['profile_image'])
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'{user.get("email")}: {e}')
+                continue
+            users.update_one({'_id': user['_id']}, {'$set': {'profile_thumb': ref}})
+            done += 1
+        return done, failed
+
+    def _backfill_votes(self):
+        votes = get_collection(Vote)
+        query = {
+            'voter_thumb': {'$in': [None, '']},
+            'voter_image': {'$nin': [None, '']},
+            'image_status': {'$ne': Vote.IMAGE_PENDING},
+        }
+        done = failed = 0
+        for doc in list(votes.find(query, {'voter_image': 1})):
+            try:
+                ref = thumbnails_from_storage(doc['voter_image'])
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'vote {doc["_id"]}: {e}')
+                continue
+            votes.update_one({'_id': doc['_id']}, {'$set': {'voter_thumb': ref}})
+            done += 1
+        return done, failed
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from voting.image_pipeline import process_vote_image, reset_vote_images
+from voting.uploads import sweep_staged_uploads
+
+
+class Command(BaseCommand):
+    help = ('Process voter images left pending by a restarted worker, retry failed ones '
+            'and delete expired staged uploads')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--election', help='Only process votes of this election id')
+        parser.add_argument('--skip-failed', action='store_true', help='Leave failed images alone')
+        parser.add_argument('--stale-minutes', type=int, default=5,
+                            help='Treat pending images older than this as abandoned (default: 5)')
+
+    def handle(self, *args, **options):
+        vote_ids = reset_vote_images(
+            election_id=options['election'],
+            include_failed=not options['skip_failed'],
+            stale_after=timedelta(minutes=options['stale_minutes']),
+        )
+        self.stdout.write(f'Processing {len(vote_ids)} voter images...')
+        for vote_id in vote_ids:
+            # Run inline: background retries would not outlive this command
+            process_vote_image(vote_id)
+        # After processing, so staged files of the ballots just done are gone already
+        self.stdout.write(f'Deleted {sweep_staged_uploads()} expired staged uploads.')
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from voting.tallies import rebuild_tallies
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the per-candidate tally counters from the raw votes. '
+            'Overwrites live counters, so run it while no ballots are being cast')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--election', action='append', dest='elections',
+                            help='Only rebuild this election id (can be repeated)')
+
+    def handle(self, *args, **options):
+        count = rebuild_tallies(options['elections'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} tallies.'))
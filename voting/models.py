@@ -57,6 +57,10 @@ class LocationData(models.Model):
 
 
 class Vote(models.Model):
+    IMAGE_PENDING = 'pending'
+    IMAGE_DONE = 'done'
+    IMAGE_FAILED = 'failed'
+
     _id = models.ObjectIdField()
     election_id = models.CharField(max_length=100)
     candidate_id = models.CharField(max_length=100)
@@ -69,6 +73,12 @@ class Vote(models.Model):
     ip_address = models.GenericIPAddressField()
     voted_at = models.DateTimeField(auto_now_add=True)
 
+    # Background image processing state (see voting/image_pipeline.py)
+    image_status = models.CharField(max_length=20, default=IMAGE_DONE)
+    image_attempts = models.IntegerField(default=0)
+    image_error = models.TextField(blank=True, default='')
+    voter_thumb = models.CharField(max_length=100, null=True, blank=True)
+
     class Meta:
         db_table = 'votes'
         unique_together = ['election_id', 'voter_email']
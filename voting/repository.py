@@ -0,0 +1,173 @@
+"""
+Data access for the student voting pages and the results page.
+
+Two interchangeable implementations of the same reads:
+
+* ``DjongoRepository`` goes through the ORM, i.e. Django renders SQL, djongo
+  parses it with sqlparse and translates it into a Mongo command.
+* ``NativeRepository`` issues the equivalent pymongo command directly on the
+  same collections and builds the same model instances from the documents.
+
+``get_repository()`` returns the one selected by ``VOTING_NATIVE_REPOSITORY``
+so both paths can be compared in place; ``scripts/benchmark_repository.py``
+measures the per-call difference. ``election_candidates()`` serves candidate
+lists through the cache tier (college_voting/cache.py).
+
+``AsyncRepository`` issues the native commands through the async driver for
+the async views (voting/async_views.py).
+"""
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+
+from college_voting.cache import CANDIDATES, cached, get_cache, make_key, namespace_timeout
+from college_voting.mongo import document_to_instance, get_collection
+from college_voting.mongo_async import get_async_collection
+from .models import Candidate, Election, Vote
+from .vote_service import voted_election_ids
+
+
+def _object_id(value):
+    try:
+        return ObjectId(str(value))
+    except (InvalidId, TypeError):
+        return None
+
+
+class DjongoRepository:
+    name = 'djongo'
+
+    def active_elections(self):
+        """Active elections, newest first"""
+        # Filter in Python to avoid Djongo boolean filter bugs
+        return [e for e in Election.objects.all().order_by('-created_at') if e.is_active]
+
+    def voted_election_ids(self, email):
+        return {str(eid) for eid in Vote.objects.filter(voter_email=email).values_list('election_id', flat=True)}
+
+    def has_voted(self, election_id, email):
+        return Vote.objects.filter(election_id=str(election_id), voter_email=email).exists()
+
+    def candidates(self, election_id, fields=None):
+        queryset = Candidate.objects.filter(election_id=str(election_id))
+        if fields:
+            queryset = queryset.only(*fields)
+        return list(queryset)
+
+    def get_candidate(self, candidate_id, election_id=None):
+        oid = _object_id(candidate_id)
+        if oid is None:
+            return None
+        queryset = Candidate.objects.filter(_id=oid)
+        if election_id is not None:
+            queryset = queryset.filter(election_id=str(election_id))
+        return queryset.first()
+
+    def get_vote(self, election_id, email):
+        return Vote.objects.filter(election_id=str(election_id), voter_email=email).first()
+
+
+class NativeRepository:
+    name = 'native'
+
+    def active_elections(self):
+        docs = get_collection(Election).find({'is_active': True}).sort('created_at', -1)
+        return [document_to_instance(Election, doc) for doc in docs]
+
+    def voted_election_ids(self, email):
+        return voted_election_ids(email)
+
+    def has_voted(self, election_id, email):
+        # Answered from the unique (election_id, voter_email) index
+        doc = get_collection(Vote).find_one(
+            {'election_id': str(election_id), 'voter_email': email}, {'_id': 1}
+        )
+        return doc is not None
+
+    def candidates(self, election_id, fields=None):
+        projection = None
+        if fields:
+            columns = [Candidate._meta.get_field(f).column for f in fields]
+            projection = dict.fromkeys(columns, 1)
+        docs = get_collection(Candidate).find({'election_id': str(election_id)}, projection)
+        return [document_to_instance(Candidate, doc, fields) for doc in docs]
+
+    def get_candidate(self, candidate_id, election_id=None):
+        oid = _object_id(candidate_id)
+        if oid is None:
+            return None
+        query = {'_id': oid}
+        if election_id is not None:
+            query['election_id'] = str(election_id)
+        doc = get_collection(Candidate).find_one(query)
+        return document_to_instance(Candidate, doc) if doc else None
+
+    def get_vote(self, election_id, email):
+        doc = get_collection(Vote).find_one({'election_id': str(election_id), 'voter_email': email})
+        return document_to_instance(Vote, doc) if doc else None
+
+
+class AsyncRepository:
+    name = 'async'
+
+    async def active_elections(self):
+        cursor = get_async_collection(Election).find({'is_active': True}).sort('created_at', -1)
+        return [document_to_instance(Election, doc) async for doc in cursor]
+
+    async def voted_election_ids(self, email):
+        cursor = get_async_collection(Vote).find({'voter_email': email}, {'election_id': 1, '_id': 0})
+        return {doc['election_id'] async for doc in cursor}
+
+    async def has_voted(self, election_id, email):
+        doc = await get_async_collection(Vote).find_one(
+            {'election_id': str(election_id), 'voter_email': email}, {'_id': 1}
+        )
+        return doc is not None
+
+    async def candidates(self, election_id):
+        cursor = get_async_collection(Candidate).find({'election_id': str(election_id)})
+        return [document_to_instance(Candidate, doc) async for doc in cursor]
+
+    async def get_candidate(self, candidate_id, election_id=None):
+        oid = _object_id(candidate_id)
+        if oid is None:
+            return None
+        query = {'_id': oid}
+        if election_id is not None:
+            query['election_id'] = str(election_id)
+        doc = await get_async_collection(Candidate).find_one(query)
+        return document_to_instance(Candidate, doc) if doc else None
+
+    async def get_vote(self, election_id, email):
+        doc = await get_async_collection(Vote).find_one({'election_id': str(election_id), 'voter_email': email})
+        return document_to_instance(Vote, doc) if doc else None
+
+
+djongo_repository = DjongoRepository()
+native_repository = NativeRepository()
+async_repository = AsyncRepository()
+
+
+def get_repository():
+    if getattr(settings, 'VOTING_NATIVE_REPOSITORY', False):
+        return native_repository
+    return djongo_repository
+
+
+def election_candidates(election_id, fields=None):
+    """Candidates of an election, cached until an admin changes candidates"""
+    fields = tuple(fields or ())
+    return cached(
+        CANDIDATES, (election_id, *fields),
+        lambda: get_repository().candidates(election_id, fields or None),
+    )
+
+
+async def aelection_candidates(election_id):
+    """election_candidates() for async views; shares its cache entries"""
+    key = make_key(CANDIDATES, election_id)
+    candidates = get_cache().get(key)
+    if candidates is None:
+        candidates = await async_repository.candidates(election_id)
+        get_cache().set(key, candidates, namespace_timeout())
+    return candidates
@@ -0,0 +1,218 @@
+"""
+Materialized per-candidate vote counters.
+
+One document per election in the ``tallies`` collection::
+
+    {'_id': '<election id>', 'counts': {'<candidate id>': 12, ...},
+     'total': 40, 'version': 41, 'updated_at': <datetime>}
+
+Counters are bumped with ``$inc`` right after a ballot is inserted, so
+results and per-election totals are read in O(candidates) instead of by
+loading every vote. ``version`` increases on every change and can be used
+as a cheap change marker. A ballot for an election without a tally document
+(one that predates the collection) builds it from the raw votes instead;
+deleted ballots are taken out with negative ``$inc``s. ``rebuild_tallies``
+(the offline ``reconcile_tallies`` command) recomputes every counter from
+the raw votes.
+"""
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from college_voting.mongo import get_collection
+from college_voting.mongo_async import get_async_collection
+from .models import Vote
+
+logger = logging.getLogger(__name__)
+
+TALLY_COLLECTION = 'tallies'
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _tallies():
+    return get_collection(TALLY_COLLECTION)
+
+
+def _tally_updates(votes, step=1):
+    per_election = defaultdict(lambda: defaultdict(int))
+    for election_id, candidate_id in votes:
+        per_election[str(election_id)][str(candidate_id)] += step
+    now = timezone.now()
+    ops = []
+    for election_id, counts in per_election.items():
+        inc = {f'counts.{candidate_id}': n for candidate_id, n in counts.items()}
+        inc['total'] = sum(counts.values())
+        inc['version'] = 1
+        # Never upsert: a tally created here would hold only these ballots
+        ops.append(UpdateOne({'_id': election_id}, {'$inc': inc, '$set': {'updated_at': now}}))
+    return ops
+
+
+def _vote_counts(match):
+    pipeline = [
+        {'$match': match},
+        {'$group': {'_id': {'e': '$election_id', 'c': '$candidate_id'}, 'n': {'$sum': 1}}},
+    ]
+    counts = defaultdict(dict)
+    for row in get_collection(Vote).aggregate(pipeline):
+        counts[row['_id']['e']][row['_id']['c']] = row['n']
+    return counts
+
+
+def record_votes(votes):
+    """
+    Count newly inserted ballots, given as (election_id, candidate_id) pairs,
+    with one bulk write. Elections without a tally yet get one built from
+    their votes, which include the ballots just inserted.
+    """
+    votes = list(votes)
+    ops = _tally_updates(votes)
+    if not ops:
+        return
+    result = _tallies().bulk_write(ops, ordered=False)
+    if result.matched_count < len(ops):
+        create_missing_tallies({election_id for election_id, _ in votes})
+
+
+async def arecord_votes(votes):
+    """record_votes() through the async driver"""
+    votes = list(votes)
+    ops = _tally_updates(votes)
+    if not ops:
+        return
+    result = await get_async_collection(TALLY_COLLECTION).bulk_write(ops, ordered=False)
+    if result.matched_count < len(ops):
+        await sync_to_async(create_missing_tallies, thread_sensitive=False)(
+            {election_id for election_id, _ in votes}
+        )
+
+
+def record_vote(election_id, candidate_id):
+    record_votes([(election_id, candidate_id)])
+
+
+def remove_votes(votes):
+    """
+    Take deleted ballots, given as (election_id, candidate_id) pairs, back
+    out of the counters. Safe while other ballots are being counted.
+    """
+    ops = _tally_updates(votes, step=-1)
+    if ops:
+        _tallies().bulk_write(ops, ordered=False)
+
+
+def create_missing_tallies(election_ids):
+    """
+    Build the tally of each election that has none yet from its votes.
+    Existing tallies are left alone, so this is safe while ballots are being
+    counted. Two ballots racing to create the same tally may still miss one
+    another; ``reconcile_tallies`` repairs that. Returns the number created.
+    """
+    election_ids = [str(eid) for eid in election_ids]
+    existing = {doc['_id'] for doc in _tallies().find({'_id': {'$in': election_ids}}, {'_id': 1})}
+    missing = [eid for eid in election_ids if eid not in existing]
+    if not missing:
+        return 0
+    counts = _vote_counts({'election_id': {'$in': missing}})
+    now = timezone.now()
+    ops = [
+        UpdateOne(
+            {'_id': election_id},
+            {'$setOnInsert': {'counts': counts[election_id], 'total': sum(counts[election_id].values()),
+                              'version': 1, 'updated_at': now}},
+            upsert=True,
+        )
+        for election_id in missing
+    ]
+    try:
+        _tallies().bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # Another process created some of them first; theirs stand
+        if any(err.get('code') != DUPLICATE_KEY_ERROR for err in e.details.get('writeErrors', [])):
+            raise
+    return len(ops)
+
+
+def rebuild_tallies(election_ids=None):
+    """
+    Recompute counters from the votes collection, for the given elections or
+    for every election that has votes. Returns the number of tallies written.
+
+    Overwrites the counters, so a ballot counted while this runs can be lost
+    or counted twice: only for the offline ``reconcile_tallies`` command.
+    """
+    match = {}
+    if election_ids is not None:
+        election_ids = [str(eid) for eid in election_ids]
+        match = {'election_id': {'$in': election_ids}}
+    counts = _vote_counts(match)
+
+    # Elections asked for explicitly get a (possibly empty) tally too
+    for election_id in election_ids or []:
+        counts.setdefault(election_id, {})
+
+    now = timezone.now()
+    ops = [
+        UpdateOne(
+            {'_id': election_id},
+            {'$set': {'counts': candidate_counts, 'total': sum(candidate_counts.values()), 'updated_at': now},
+             '$inc': {'version': 1}},
+            upsert=True,
+        )
+        for election_id, candidate_counts in counts.items()
+    ]
+    if ops:
+        _tallies().bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def get_tally(election_id):
+    """Return {'counts': {...}, 'total': n, 'version': n} for an election"""
+    election_id = str(election_id)
+    doc = _tallies().find_one({'_id': election_id})
+    if doc is None:
+        # Election predates the tallies collection: build it once from votes
+        create_missing_tallies([election_id])
+        doc = _tallies().find_one({'_id': election_id}) or {}
+    return {
+        'counts': doc.get('counts', {}),
+        'total': doc.get('total', 0),
+        'version': doc.get('version', 0),
+    }
+
+
+def get_vote_total(election_id):
+    return get_tally(election_id)['total']
+
+
+def get_vote_totals(election_ids):
+    """
+    Return {election id: total votes} for many elections in at most two
+    queries: one read of their tallies, plus one ``$group`` over the votes
+    of any election that has no tally document yet.
+    """
+    election_ids = [str(eid) for eid in election_ids]
+    if not election_ids:
+        return {}
+    totals = {
+        doc['_id']: doc.get('total', 0)
+        for doc in _tallies().find({'_id': {'$in': election_ids}}, {'total': 1})
+    }
+    missing = [eid for eid in election_ids if eid not in totals]
+    if missing:
+        pipeline = [
+            {'$match': {'election_id': {'$in': missing}}},
+            {'$group': {'_id': '$election_id', 'n': {'$sum': 1}}},
+        ]
+        counted = {row['_id']: row['n'] for row in get_collection(Vote).aggregate(pipeline)}
+        for election_id in missing:
+            totals[election_id] = counted.get(election_id, 0)
+    return totals
+
+
+def delete_tally(election_id):
+    _tallies().delete_one({'_id': str(election_id)})
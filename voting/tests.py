@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import mock
+
+from bson import ObjectId
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.shortcuts import render
+from django.test import RequestFactory, SimpleTestCase
+from django.utils import timezone
+
+from accounts.models import User
+from .admin_views import manage_elections
+from .models import Election
+from .tallies import TALLY_COLLECTION
+
+
+class FakeCollection:
+    """Answers find() and aggregate() from canned rows, logging every command"""
+
+    def __init__(self, name, log, rows):
+        self.name = name
+        self.log = log
+        self.rows = rows
+
+    def find(self, *args, **kwargs):
+        self.log.append((self.name, 'find'))
+        return iter(self.rows)
+
+    def aggregate(self, *args, **kwargs):
+        self.log.append((self.name, 'aggregate'))
+        return iter(self.rows)
+
+
+class ManageElectionsQueryCountTest(SimpleTestCase):
+    """manage_elections fetches vote totals with a fixed number of queries"""
+
+    def make_elections(self, n):
+        now = timezone.now()
+        return [
+            Election(_id=ObjectId(), title=f'Election {i}', description='Test election',
+                     start_date=now - timedelta(days=1), end_date=now + timedelta(days=1),
+                     created_by='admin@sfscollege.in', is_active=True, created_at=now)
+            for i in range(n)
+        ]
+
+    def render_page(self, elections):
+        # Half the elections have a tally document, the rest predate it
+        tallied = elections[::2]
+        rows = {
+            TALLY_COLLECTION: [{'_id': str(e._id), 'total': 3} for e in tallied],
+            'votes': [{'_id': str(e._id), 'n': 2} for e in elections[1::2]],
+        }
+        log = []
+
+        def get_collection(model_or_name):
+            name = model_or_name if isinstance(model_or_name, str) else model_or_name._meta.db_table
+            return FakeCollection(name, log, rows[name])
+
+        request = RequestFactory().get('/admin/elections/')
+        request.user = User(email='admin@sfscollege.in', full_name='Admin', is_admin=True)
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+
+        queryset = mock.Mock()
+        queryset.order_by.return_value = elections
+        with mock.patch.object(Election.objects, 'all', return_value=queryset), \
+                mock.patch('voting.tallies.get_collection', get_collection), \
+                mock.patch('voting.admin_views.render', wraps=render) as render_mock:
+            response = manage_elections(request)
+
+        self.assertEqual(response.status_code, 200)
+        rendered = render_mock.call_args[0][2]['elections']
+        expected = {str(e._id): 3 if e in tallied else 2 for e in elections}
+        self.assertEqual({str(e._id): e.vote_count for e in rendered}, expected)
+        return log
+
+    def test_vote_totals_take_at_most_two_queries(self):
+        for n in (1, 10, 50):
+            with self.subTest(elections=n):
+                log = self.render_page(self.make_elections(n))
+                self.assertLessEqual(len(log), 2)
+
+    def test_query_count_does_not_grow_with_elections(self):
+        self.assertEqual(
+            len(self.render_page(self.make_elections(2))),
+            len(self.render_page(self.make_elections(40))),
+        )
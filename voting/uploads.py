@@ -0,0 +1,307 @@
+"""
+Streaming upload of voter webcam images.
+
+The vote page posts the captured JPEG as a raw ``Blob`` (or a multipart file)
+to ``upload_voter_image`` before submitting the ballot. The body is copied to
+storage chunk by chunk, so the image is never held in memory as a base64
+string, and the view answers with a signed token that ``submit_vote`` accepts
+in place of the old ``voter_image`` data-URI field.
+
+Staged files live under ``voter_uploads/<user id>/``. A student may stage at
+most ``VOTER_IMAGE_MAX_PENDING_UPLOADS`` images per token lifetime, and
+``sweep_staged_uploads`` (run by the ``process_vote_images`` command) deletes
+staged files whose token has expired and that no ballot references.
+
+The ``a``-prefixed helpers are for async views: with local file storage they
+use aiofiles so file I/O does not block the event loop, and fall back to the
+storage API in a worker thread for remote storage.
+"""
+import logging
+import os
+import uuid
+from datetime import timedelta
+
+import aiofiles
+import aiofiles.os
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from college_voting.mongo import get_collection
+from college_voting.mongo_async import get_async_collection
+from .models import Vote
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = 'voter_uploads'
+# Extra age a staged file needs before the sweep, so a ballot submitted with
+# a token just before it expires still finds its file
+SWEEP_GRACE = 60  # seconds
+TOKEN_SALT = 'voting.voter-image-upload'
+
+# Leading bytes of the image formats a browser canvas can produce
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'RIFF', 'webp'),
+)
+
+
+class UploadError(Exception):
+    """Raised when an upload or upload token is rejected"""
+
+
+def max_upload_bytes():
+    return getattr(settings, 'VOTER_IMAGE_MAX_BYTES', 5 * 1024 * 1024)
+
+
+def token_max_age():
+    return getattr(settings, 'VOTER_IMAGE_TOKEN_MAX_AGE', 15 * 60)
+
+
+def sniff_image_type(head):
+    for signature, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            if ext == 'webp' and head[8:12] != b'WEBP':
+                continue
+            return ext
+    return None
+
+
+class _CappedStream:
+    """File-like reader that enforces a size limit and checks the image header"""
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.size = 0
+        self._head = b''
+        self.ext = None
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.size += len(data)
+        if self.size > self.limit:
+            raise UploadError('Image is too large.')
+        if self.ext is None and data:
+            # The format is decided from the first chunk read
+            self._head += data[:16]
+            self.ext = sniff_image_type(self._head)
+            if self.ext is None:
+                raise UploadError('Unsupported image format.')
+        return data
+
+
+class _Prepend:
+    """Reader that yields an already-read first chunk before the rest"""
+
+    def __init__(self, first_chunk, stream):
+        self.first_chunk = first_chunk
+        self.stream = stream
+
+    def read(self, size=-1):
+        if self.first_chunk:
+            data, self.first_chunk = self.first_chunk, b''
+            return data
+        return self.stream.read(size)
+
+
+def _staged_files(directory):
+    """Storage names and modification times of the files under ``directory``"""
+    try:
+        dirs, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        path = f'{directory}/{name}'
+        try:
+            yield path, default_storage.get_modified_time(path)
+        except FileNotFoundError:
+            continue  # Deleted meanwhile
+    for sub in dirs:
+        yield from _staged_files(f'{directory}/{sub}')
+
+
+def _user_staging_dir(user):
+    return f'{STAGING_DIR}/{user.pk}'
+
+
+def stage_voter_image(request):
+    """
+    Copy the uploaded image from ``request`` to staging storage in chunks.
+
+    Accepts either a multipart upload (field ``voter_image``) or a raw
+    ``image/*`` / ``application/octet-stream`` body. Returns the storage name.
+    """
+    # Bound what one student can stage while their tokens are valid
+    directory = _user_staging_dir(request.user)
+    cutoff = timezone.now() - timedelta(seconds=token_max_age())
+    recent = sum(1 for _, modified in _staged_files(directory) if modified > cutoff)
+    if recent >= getattr(settings, 'VOTER_IMAGE_MAX_PENDING_UPLOADS', 10):
+        raise UploadError('Too many image uploads. Please wait a few minutes and try again.')
+
+    limit = max_upload_bytes()
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > limit:
+        raise UploadError('Image is too large.')
+
+    if request.content_type == 'multipart/form-data':
+        upload = request.FILES.get('voter_image')
+        if upload is None:
+            raise UploadError('No image uploaded.')
+        stream = _CappedStream(upload, limit)
+    elif request.content_type.startswith('image/') or request.content_type == 'application/octet-stream':
+        stream = _CappedStream(request, limit)
+    else:
+        raise UploadError('Unsupported upload type.')
+
+    # Read the header up front so the file gets the right extension
+    first_chunk = stream.read(File.DEFAULT_CHUNK_SIZE)
+    if not first_chunk:
+        raise UploadError('No image uploaded.')
+
+    name = f'{directory}/{uuid.uuid4().hex}.{stream.ext}'
+    try:
+        name = default_storage.save(name, File(_Prepend(first_chunk, stream), name=name))
+    except UploadError:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        raise
+    return name
+
+
+def make_upload_token(name, email, election_id):
+    """Sign the staged file name so only this voter can use it for this election"""
+    return signing.dumps({'n': name, 'e': email, 'el': election_id}, salt=TOKEN_SALT)
+
+
+def _token_name(token, email, election_id):
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT, max_age=token_max_age())
+    except signing.BadSignature:
+        raise UploadError('Image upload expired. Please capture your photo again.')
+    if data.get('e') != email or data.get('el') != election_id:
+        raise UploadError('Image upload does not belong to this ballot.')
+    return data['n']
+
+
+def read_upload_token(token, email, election_id):
+    """Return the staged file name for a valid token, or raise UploadError"""
+    name = _token_name(token, email, election_id)
+    if not default_storage.exists(name):
+        raise UploadError('Uploaded image not found. Please capture your photo again.')
+    return name
+
+
+def _ballot_query(name, email, election_id):
+    return {'election_id': str(election_id), 'voter_email': email, 'voter_image': name}
+
+
+def release_staged_image(name, email, election_id):
+    """
+    Delete a staged image after its ballot was rejected as a duplicate,
+    unless the ballot already stored for this voter references it.
+    """
+    if get_collection(Vote).find_one(_ballot_query(name, email, election_id), {'_id': 1}) is None:
+        default_storage.delete(name)
+
+
+def sweep_staged_uploads():
+    """
+    Delete staged images older than the token lifetime that no ballot
+    references; those can never be used again. Returns how many were deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=token_max_age() + SWEEP_GRACE)
+    expired = [name for name, modified in _staged_files(STAGING_DIR) if modified < cutoff]
+    deleted = 0
+    for start in range(0, len(expired), 500):
+        batch = expired[start:start + 500]
+        # Ballots whose image is still pending or failed point at their staged file
+        referenced = {
+            doc['voter_image']
+            for doc in get_collection(Vote).find({'voter_image': {'$in': batch}}, {'voter_image': 1})
+        }
+        for name in batch:
+            if name not in referenced:
+                default_storage.delete(name)
+                deleted += 1
+    if deleted:
+        logger.info("Deleted %d expired staged voter image(s)", deleted)
+    return deleted
+
+
+def _local_path(name):
+    """Filesystem path of a stored file, or None for remote storage"""
+    try:
+        return default_storage.path(name)
+    except NotImplementedError:
+        return None
+
+
+async def aread_upload_token(token, email, election_id):
+    """read_upload_token() for async views"""
+    name = _token_name(token, email, election_id)
+    path = _local_path(name)
+    if path is None:
+        exists = await sync_to_async(default_storage.exists, thread_sensitive=False)(name)
+    else:
+        exists = await aiofiles.os.path.exists(path)
+    if not exists:
+        raise UploadError('Uploaded image not found. Please capture your photo again.')
+    return name
+
+
+_chmod = aiofiles.os.wrap(os.chmod)
+
+
+def _available_name(name):
+    return default_storage.get_available_name(default_storage.generate_filename(name))
+
+
+async def asave_file(name, data):
+    """
+    Write ``data`` to storage under ``name`` or, if that is taken, the
+    name the storage picks instead; returns the stored name. Local files get
+    the same names and permissions as ``default_storage.save()`` gives them.
+    """
+    if _local_path(name) is None:
+        return await sync_to_async(default_storage.save, thread_sensitive=False)(name, ContentFile(data))
+    while True:
+        # Picking a free name checks the disk, so it runs off the event loop
+        name = await sync_to_async(_available_name, thread_sensitive=False)(name)
+        path = default_storage.path(name)
+        directory = os.path.dirname(path)
+        await aiofiles.os.makedirs(directory, exist_ok=True)
+        if default_storage.directory_permissions_mode is not None:
+            await _chmod(directory, default_storage.directory_permissions_mode)
+        try:
+            # Exclusive create, like the storage: a name taken meanwhile is retried
+            async with aiofiles.open(path, 'xb') as f:
+                await f.write(data)
+        except FileExistsError:
+            continue
+        break
+    if default_storage.file_permissions_mode is not None:
+        await _chmod(path, default_storage.file_permissions_mode)
+    return name
+
+
+async def adelete_file(name):
+    path = _local_path(name)
+    if path is None:
+        await sync_to_async(default_storage.delete, thread_sensitive=False)(name)
+    elif await aiofiles.os.path.exists(path):
+        await aiofiles.os.remove(path)
+
+
+async def arelease_staged_image(name, email, election_id):
+    """release_staged_image() for async views"""
+    if await get_async_collection(Vote).find_one(_ballot_query(name, email, election_id), {'_id': 1}) is None:
+        await adelete_file(name)
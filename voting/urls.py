@@ -1,12 +1,20 @@
+from django.conf import settings
 from django.urls import path
 from . import views, admin_views
 
+# Async student views for ASGI deployments (see voting/async_views.py)
+if getattr(settings, 'VOTING_ASYNC_VIEWS', False):
+    from . import async_views as student_views
+else:
+    student_views = views
+
 urlpatterns = [
     # Student URLs
-    path('dashboard/', views.student_dashboard, name='student_dashboard'),
-    path('vote/<str:election_id>/', views.vote_page, name='vote_page'),
-    path('vote/<str:election_id>/submit/', views.submit_vote, name='submit_vote'),
-    path('vote/<str:election_id>/confirmation/', views.vote_confirmation, name='vote_confirmation'),
+    path('dashboard/', student_views.student_dashboard, name='student_dashboard'),
+    path('vote/<str:election_id>/', student_views.vote_page, name='vote_page'),
+    path('vote/<str:election_id>/image/', views.upload_voter_image, name='upload_voter_image'),
+    path('vote/<str:election_id>/submit/', student_views.submit_vote, name='submit_vote'),
+    path('vote/<str:election_id>/confirmation/', student_views.vote_confirmation, name='vote_confirmation'),
     
     # Admin URLs
     path('admin/dashboard/', admin_views.admin_dashboard, name='admin_dashboard'),
@@ -17,6 +25,10 @@ urlpatterns = [
     path('admin/elections/<str:election_id>/candidates/', admin_views.manage_candidates, name='manage_candidates'),
     path('admin/candidates/<str:candidate_id>/delete/', admin_views.delete_candidate, name='delete_candidate'),
     path('admin/elections/<str:election_id>/results/', admin_views.view_results, name='view_results'),
+    path('admin/elections/<str:election_id>/results/audit/', admin_views.audit_log, name='audit_log'),
+    path('admin/elections/<str:election_id>/results.json', admin_views.results_json, name='results_json'),
+    path('admin/elections/<str:election_id>/results/retry-images/', admin_views.retry_vote_images, name='retry_vote_images'),
     path('admin/students/', admin_views.manage_students, name='manage_students'),
     path('admin/students/<str:user_id>/delete/', admin_views.delete_student, name='delete_student'),
+    path('admin/metrics/connections.json', admin_views.connection_metrics, name='connection_metrics'),
 ]
@@ -1,9 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
 from django.core.files.base import ContentFile
-from django.utils import timezone
-from .models import Election, Candidate, Vote
+from functools import partial
+from .models import Vote
+from accounts.location_buffer import location_buffer
+from .election_resolver import resolve_election
+from .vote_service import cast_vote
+from .repository import election_candidates, get_repository
+from .election_catalog import ACTIVE, catalog
+from college_voting.cache import CANDIDATES, ELECTIONS, namespace_timeout, namespace_version
+from .uploads import UploadError, stage_voter_image, make_upload_token, read_upload_token, release_staged_image
 import base64
 import json
 from bson import ObjectId
@@ -33,39 +42,26 @@ def student_dashboard(request):
     if request.user.is_admin:
         return redirect('admin_dashboard')
     
-    # Get all elections from DB and process in Python to avoid Djongo query issues
-    all_elections = Election.objects.all().order_by('-created_at')
+    # Shared catalog of active elections; only the voted set is per student
+    voted_elections = get_repository().voted_election_ids(request.user.email)
     
-    # Check which elections user has voted in (robust string matching)
-    voted_elections = [str(vid) for vid in Vote.objects.filter(voter_email=request.user.email).values_list('election_id', flat=True)]
-    
-    now = timezone.now()
     elections_data = []
-    
-    for election in all_elections:
-        if not election.is_active:
-            continue
-            
-        status = 'upcoming'
-        can_vote = False
-        
-        if election.start_date <= now <= election.end_date:
-            status = 'active'
-            can_vote = True
-        elif now > election.end_date:
-            status = 'ended'
-        
+    for entry in catalog.entries():
+        has_voted = entry['election_id'] in voted_elections
         elections_data.append({
-            'election': election,
-            'election_id': str(election._id),  # Add election_id as string for template
-            'has_voted': str(election._id) in voted_elections,
-            'status': status,
-            'can_vote': can_vote and (str(election._id) not in voted_elections)
+            'election': entry['election'],
+            'election_id': entry['election_id'],
+            'has_voted': has_voted,
+            'status': entry['status'],
+            'can_vote': entry['status'] == ACTIVE and not has_voted
         })
     
     context = {
         'user': request.user,
-        'elections': elections_data
+        'elections': elections_data,
+        # Election cards are cached as template fragments keyed by these
+        'elections_version': namespace_version(ELECTIONS),
+        'fragment_timeout': namespace_timeout(),
     }
     return render(request, 'student/dashboard.html', context)
 
@@ -75,31 +71,7 @@ def vote_page(request, election_id):
     if request.user.is_admin:
         return redirect('admin_dashboard')
     
-    # --- SAFE ELECTION FETCHING ---
-    from bson import ObjectId
-    clean_eid = str(election_id).strip()
-    election = None
-    
-    # Method 1: Direct PK
-    try:
-        election = Election.objects.filter(pk=clean_eid).first()
-    except: pass
-
-    # Method 2: ObjectId lookup
-    if not election and len(clean_eid) == 24:
-        try:
-            election = Election.objects.filter(_id=ObjectId(clean_eid)).first()
-        except: pass
-
-    # Method 3: List find
-    if not election:
-        try:
-            for e in Election.objects.all():
-                if str(getattr(e, '_id', e.pk)) == clean_eid:
-                    election = e
-                    break
-        except: pass
-
+    election = resolve_election(election_id)
     if not election:
         messages.error(request, 'Election not found.')
         return redirect('student_dashboard')
@@ -109,17 +81,20 @@ def vote_page(request, election_id):
         messages.error(request, 'This election is not currently active.')
         return redirect('student_dashboard')
     
+    repository = get_repository()
+    
     # Check if user has already voted
-    if Vote.objects.filter(election_id=str(election._id), voter_email=request.user.email).exists():
+    if repository.has_voted(election._id, request.user.email):
         messages.warning(request, 'You have already voted in this election.')
         return redirect('student_dashboard')
     
-    # Get candidates for this election
-    candidates = Candidate.objects.filter(election_id=str(election._id))
-    
     context = {
         'election': election,
-        'candidates': candidates
+        # Called by the template only when the cached candidate list misses
+        'candidates': partial(election_candidates, election._id),
+        'elections_version': namespace_version(ELECTIONS),
+        'candidates_version': namespace_version(CANDIDATES),
+        'fragment_timeout': namespace_timeout(),
     }
     return render(request, 'student/vote.html', context)
 
@@ -132,31 +107,7 @@ def submit_vote(request, election_id):
     if request.user.is_admin:
         return redirect('admin_dashboard')
     
-    # --- SAFE ELECTION FETCHING ---
-    from bson import ObjectId
-    clean_eid = str(election_id).strip()
-    election = None
-    
-    # Method 1: Direct PK
-    try:
-        election = Election.objects.filter(pk=clean_eid).first()
-    except: pass
-
-    # Method 2: ObjectId lookup
-    if not election and len(clean_eid) == 24:
-        try:
-            election = Election.objects.filter(_id=ObjectId(clean_eid)).first()
-        except: pass
-
-    # Method 3: List find
-    if not election:
-        try:
-            for e in Election.objects.all():
-                if str(getattr(e, '_id', e.pk)) == clean_eid:
-                    election = e
-                    break
-        except: pass
-
+    election = resolve_election(election_id)
     if not election:
         messages.error(request, 'Election not found.')
         return redirect('student_dashboard')
@@ -166,38 +117,40 @@ def submit_vote(request, election_id):
         messages.error(request, 'This election is not currently active.')
         return redirect('student_dashboard')
     
-    # Check if user has already voted
-    if Vote.objects.filter(election_id=str(election._id), voter_email=request.user.email).exists():
-        messages.warning(request, 'You have already voted in this election.')
-        return redirect('student_dashboard')
-    
     # Get form data
     candidate_id = request.POST.get('candidate_id')
-    image_data = request.POST.get('voter_image')
+    image_token = request.POST.get('voter_image_token')
+    image_data = request.POST.get('voter_image')  # Legacy base64 data URI
     latitude = request.POST.get('latitude')
     longitude = request.POST.get('longitude')
     city = request.POST.get('city', '')
     country = request.POST.get('country', '')
     
-    if not all([candidate_id, image_data, latitude, longitude]):
+    if not all([candidate_id, image_token or image_data, latitude, longitude]):
         messages.error(request, 'Missing required data. Please ensure camera and location permissions are granted.')
         return redirect('vote_page', election_id=election_id)
     
     # Verify candidate exists
-    try:
-        candidate = Candidate.objects.get(_id=ObjectId(candidate_id), election_id=str(election._id))
-    except Candidate.DoesNotExist:
+    candidate = get_repository().get_candidate(candidate_id, election_id=election._id)
+    if candidate is None:
         messages.error(request, 'Invalid candidate selected.')
         return redirect('vote_page', election_id=election_id)
     
-    # Process image
-    try:
-        format, imgstr = image_data.split(';base64,')
-        ext = format.split('/')[-1]
-        image_file = ContentFile(base64.b64decode(imgstr), name=f'{request.user.email}_{election_id}.{ext}')
-    except Exception as e:
-        messages.error(request, 'Error processing image.')
-        return redirect('vote_page', election_id=election_id)
+    # Process image: prefer the streamed upload, fall back to the base64 field
+    if image_token:
+        try:
+            image_file = read_upload_token(image_token, request.user.email, str(election._id))
+        except UploadError as e:
+            messages.error(request, str(e))
+            return redirect('vote_page', election_id=election_id)
+    else:
+        try:
+            format, imgstr = image_data.split(';base64,')
+            ext = format.split('/')[-1]
+            image_file = ContentFile(base64.b64decode(imgstr), name=f'{request.user.email}_{election_id}.{ext}')
+        except Exception as e:
+            messages.error(request, 'Error processing image.')
+            return redirect('vote_page', election_id=election_id)
     
     # Create vote
     vote = Vote(
@@ -209,19 +162,21 @@ def submit_vote(request, election_id):
         longitude=float(longitude),
         city=city,
         country=country,
-        ip_address=get_client_ip(request)
+        ip_address=get_client_ip(request),
+        image_status=Vote.IMAGE_PENDING
     )
-    vote.save()
+    # One insert against the unique (election_id, voter_email) index; a
+    # duplicate key means this student has already voted
+    if not cast_vote(vote):
+        # cast_vote() removes a legacy image it wrote; a staged upload is ours to release
+        if image_token:
+            release_staged_image(image_file, request.user.email, election._id)
+        messages.warning(request, 'You have already voted in this election.')
+        return redirect('student_dashboard')
     
-    # Update user's location
+    # Update user's location (coalesced with update_location pings)
     try:
-        user = request.user
-        user.latitude = float(latitude)
-        user.longitude = float(longitude)
-        user.city = city
-        user.country = country
-        user.last_location_update = timezone.now()
-        user.save()
+        location_buffer.record(request.user, float(latitude), float(longitude), city, country)
     except Exception as e:
         # Log error but don't fail the vote
         print(f"Error updating user location: {e}")
@@ -232,43 +187,41 @@ def submit_vote(request, election_id):
 
 
 @login_required
-def vote_confirmation(request, election_id):
+@require_POST
+def upload_voter_image(request, election_id):
+    """AJAX endpoint that streams the voter's webcam image to storage"""
     if request.user.is_admin:
-        return redirect('admin_dashboard')
-    
-    # --- SAFE ELECTION FETCHING ---
-    from bson import ObjectId
-    clean_eid = str(election_id).strip()
-    election = None
-    
-    # Method 1: Direct PK
+        return JsonResponse({'success': False, 'error': 'Admins cannot vote'}, status=403)
+
+    election = resolve_election(election_id)
+    if not election or not election.is_ongoing():
+        return JsonResponse({'success': False, 'error': 'This election is not currently active.'}, status=404)
+
     try:
-        election = Election.objects.filter(pk=clean_eid).first()
-    except: pass
+        name = stage_voter_image(request)
+    except UploadError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
-    # Method 2: ObjectId lookup
-    if not election and len(clean_eid) == 24:
-        try:
-            election = Election.objects.filter(_id=ObjectId(clean_eid)).first()
-        except: pass
+    return JsonResponse({
+        'success': True,
+        'token': make_upload_token(name, request.user.email, str(election._id))
+    })
 
-    # Method 3: List find
-    if not election:
-        try:
-            for e in Election.objects.all():
-                if str(getattr(e, '_id', e.pk)) == clean_eid:
-                    election = e
-                    break
-        except: pass
 
+@login_required
+def vote_confirmation(request, election_id):
+    if request.user.is_admin:
+        return redirect('admin_dashboard')
+    
+    election = resolve_election(election_id)
     if not election:
         messages.error(request, 'Election not found.')
         return redirect('student_dashboard')
     
-    try:
-        vote = Vote.objects.get(election_id=str(election._id), voter_email=request.user.email)
-        candidate = Candidate.objects.get(_id=ObjectId(vote.candidate_id))
-    except (Vote.DoesNotExist, Candidate.DoesNotExist):
+    repository = get_repository()
+    vote = repository.get_vote(election._id, request.user.email)
+    candidate = repository.get_candidate(vote.candidate_id) if vote else None
+    if candidate is None:
         messages.error(request, 'Vote not found.')
         return redirect('student_dashboard')
     
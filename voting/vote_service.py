@@ -0,0 +1,307 @@
+"""
+Vote casting service.
+
+A ballot is recorded with a single insert against the unique
+(election_id, voter_email) index on the votes collection. A duplicate-key
+error from that insert *is* the "already voted" check, so there is no
+separate exists() round trip and no window for a double-submit to slip in
+between the check and the write.
+
+With ``VOTE_GROUP_COMMIT`` enabled, ballots arriving in the same process
+within ``VOTE_GROUP_COMMIT_WINDOW_MS`` of each other are written together in
+one ``insert_many``; every caller still waits for, and gets, its own result.
+
+Stored ballots are counted in the ``tallies`` collection as part of the same
+flow (see voting/tallies.py). ``acast_vote`` is the same flow for async views,
+through the async driver.
+"""
+import logging
+import os
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+from college_voting.mongo import get_collection, model_to_document, mark_saved
+from college_voting.mongo_async import get_async_collection
+from .image_pipeline import enqueue_vote_image
+from .models import Vote
+from .tallies import arecord_votes, record_votes
+
+logger = logging.getLogger(__name__)
+
+VOTE_UNIQUE_INDEX = [('election_id', ASCENDING), ('voter_email', ASCENDING)]
+VOTE_UNIQUE_INDEX_NAME = 'votes_election_id_voter_email_uniq'
+
+# Serves the newest-first, keyset-paginated audit log (voting/audit.py)
+VOTE_AUDIT_INDEX = [('election_id', ASCENDING), ('voted_at', DESCENDING), ('_id', DESCENDING)]
+VOTE_AUDIT_INDEX_NAME = 'votes_election_id_voted_at'
+
+# Covers the "which elections has this student voted in" lookup
+VOTE_VOTER_INDEX = [('voter_email', ASCENDING), ('election_id', ASCENDING)]
+VOTE_VOTER_INDEX_NAME = 'votes_voter_email_election_id'
+
+DUPLICATE_KEY_ERROR = 11000
+
+_index_verified = False
+_index_lock = threading.Lock()
+
+
+def _has_unique_vote_index(collection):
+    wanted = [(key, int(direction)) for key, direction in VOTE_UNIQUE_INDEX]
+    for spec in collection.index_information().values():
+        keys = [(key, int(direction)) for key, direction in spec.get('key', [])]
+        if spec.get('unique') and keys == wanted:
+            return True
+    return False
+
+
+def ensure_vote_indexes(db=None):
+    """
+    Verify (creating it if needed) the unique vote index, and make sure the
+    audit log and per-voter indexes exist.
+
+    Raises ImproperlyConfigured if the index cannot be guaranteed, e.g. when
+    existing duplicate votes prevent it from being built.
+    """
+    global _index_verified
+    if _index_verified:
+        return
+    with _index_lock:
+        if _index_verified:
+            return
+        collection = db[Vote._meta.db_table] if db is not None else get_collection(Vote)
+        try:
+            if not _has_unique_vote_index(collection):
+                collection.create_index(VOTE_UNIQUE_INDEX, unique=True, name=VOTE_UNIQUE_INDEX_NAME)
+                logger.info("Created unique vote index %s", VOTE_UNIQUE_INDEX_NAME)
+            collection.create_index(VOTE_AUDIT_INDEX, name=VOTE_AUDIT_INDEX_NAME)
+            collection.create_index(VOTE_VOTER_INDEX, name=VOTE_VOTER_INDEX_NAME)
+        except OperationFailure as e:
+            raise ImproperlyConfigured(
+                f"Unique (election_id, voter_email) index on '{collection.name}' "
+                f"is missing and could not be created: {e}"
+            ) from e
+        _index_verified = True
+
+
+def check_indexes_on_connect(sender, connection, **kwargs):
+    """connection_created receiver: verify indexes once per process"""
+    if _index_verified or connection.vendor != 'djongo':
+        return
+    try:
+        ensure_vote_indexes(connection.connection)
+    except Exception as e:
+        # Don't take the whole site down; cast_vote() re-checks and refuses
+        # to record ballots until the index exists.
+        logger.error("Vote index check failed at startup: %s", e)
+
+
+class _PendingVote:
+    __slots__ = ('document', 'queued_at', 'done', 'inserted', 'error')
+
+    def __init__(self, document):
+        self.document = document
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.inserted = False
+        self.error = None
+
+
+class GroupCommitWriter:
+    """
+    Collects votes submitted by concurrent request threads and writes them
+    in batches from a single background thread.
+
+    A batch is flushed when ``window_ms`` has passed since its first vote
+    was queued or when it reaches ``max_batch`` votes. The insert is
+    unordered so one duplicate does not stop the rest of the batch; each
+    write error is mapped back to the request that queued that document.
+    """
+
+    def __init__(self, collection_factory, window_ms=5, max_batch=100, timeout=10, on_inserted=None):
+        self.collection_factory = collection_factory
+        self.on_inserted = on_inserted
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.votes = 0
+
+    def submit(self, document):
+        """Queue one vote document; returns True if inserted, False on duplicate"""
+        pending = _PendingVote(document)
+        with self._cond:
+            self._ensure_thread()
+            self._queue.append(pending)
+            self._cond.notify()
+        if not pending.done.wait(self.timeout):
+            raise TimeoutError('Timed out waiting for group commit of vote')
+        if pending.error is not None:
+            raise pending.error
+        return pending.inserted
+
+    def _ensure_thread(self):
+        # Threads don't survive a fork, so restart per worker process
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='vote-group-commit', daemon=True)
+            self._thread.start()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].queued_at + self.window
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._flush(batch)
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+    def _flush(self, batch):
+        try:
+            self.collection_factory().insert_many(
+                [pending.document for pending in batch], ordered=False
+            )
+        except BulkWriteError as e:
+            failed = {err['index']: err for err in e.details.get('writeErrors', [])}
+            for index, pending in enumerate(batch):
+                err = failed.get(index)
+                if err is None:
+                    pending.inserted = True
+                elif err.get('code') != DUPLICATE_KEY_ERROR:
+                    pending.error = OperationFailure(err.get('errmsg'), err.get('code'), err)
+        except Exception as e:
+            logger.error("Group commit of %d votes failed: %s", len(batch), e)
+            for pending in batch:
+                pending.error = e
+        else:
+            for pending in batch:
+                pending.inserted = True
+        self.batches += 1
+        self.votes += len(batch)
+
+        inserted = [pending.document for pending in batch if pending.inserted]
+        if inserted and self.on_inserted is not None:
+            try:
+                self.on_inserted(inserted)
+            except Exception as e:
+                logger.error("Post-insert hook for %d votes failed: %s", len(inserted), e)
+
+
+def _count_votes(documents):
+    """Bump the tally counters for freshly inserted vote documents"""
+    record_votes((doc['election_id'], doc['candidate_id']) for doc in documents)
+
+
+_group_writer = None
+_group_writer_lock = threading.Lock()
+
+
+def get_group_writer():
+    """Process-wide GroupCommitWriter for the votes collection"""
+    global _group_writer
+    if _group_writer is None:
+        with _group_writer_lock:
+            if _group_writer is None:
+                _group_writer = GroupCommitWriter(
+                    lambda: get_collection(Vote),
+                    window_ms=getattr(settings, 'VOTE_GROUP_COMMIT_WINDOW_MS', 5),
+                    max_batch=getattr(settings, 'VOTE_GROUP_COMMIT_MAX_BATCH', 100),
+                    on_inserted=_count_votes,
+                )
+    return _group_writer
+
+
+def _insert_vote_document(document):
+    """Insert one vote document; returns False if it is a duplicate"""
+    if getattr(settings, 'VOTE_GROUP_COMMIT', False):
+        return get_group_writer().submit(document)
+    try:
+        get_collection(Vote).insert_one(document)
+    except DuplicateKeyError:
+        return False
+    try:
+        _count_votes([document])
+    except Exception as e:
+        # The ballot is stored; reconcile_tallies repairs the counters
+        logger.error("Tally update for vote %s failed: %s", document['_id'], e)
+    return True
+
+
+def voted_election_ids(email):
+    """Ids of the elections a student has voted in, read from the voter index"""
+    cursor = get_collection(Vote).find({'voter_email': email}, {'election_id': 1, '_id': 0})
+    return {doc['election_id'] for doc in cursor}
+
+
+def cast_vote(vote):
+    """
+    Record ``vote`` with one insert.
+
+    Returns True if the ballot was stored, False if this voter has already
+    voted in the election. An image file written for a rejected duplicate is
+    removed from storage again; a pending image of a stored ballot is handed
+    to the background image pipeline.
+    """
+    ensure_vote_indexes()
+    # Only clean up images written by this call, never a previously staged
+    # upload that the first (successful) ballot may be referencing
+    writes_image = bool(vote.voter_image) and not vote.voter_image._committed
+    document = model_to_document(vote)
+    if not _insert_vote_document(document):
+        if writes_image:
+            vote.voter_image.delete(save=False)
+        return False
+    mark_saved(vote)
+    if vote.image_status == Vote.IMAGE_PENDING:
+        enqueue_vote_image(vote._id)
+    return True
+
+
+async def acast_vote(vote):
+    """
+    cast_vote() for async views. The voter image must already be in storage;
+    ballots are inserted one by one, since concurrent inserts on the async
+    driver already share the connection pool.
+    """
+    if not _index_verified:
+        await sync_to_async(ensure_vote_indexes, thread_sensitive=False)()
+    document = model_to_document(vote)
+    try:
+        await get_async_collection(Vote).insert_one(document)
+    except DuplicateKeyError:
+        return False
+    mark_saved(vote)
+    try:
+        await arecord_votes([(document['election_id'], document['candidate_id'])])
+    except Exception as e:
+        # The ballot is stored; reconcile_tallies repairs the counters
+        logger.error("Tally update for vote %s failed: %s", document['_id'], e)
+    if vote.image_status == Vote.IMAGE_PENDING:
+        if getattr(settings, 'VOTER_IMAGE_ASYNC', True):
+            enqueue_vote_image(vote._id)
+        else:
+            await sync_to_async(enqueue_vote_image, thread_sensitive=False)(vote._id)
+    return True